@@ -1,17 +1,15 @@
 """Deviation Analyzer Agent - Analyzes deviations using AutoGen."""
 
-from autogen import AssistantAgent
-from src.config.agent_config import get_llm_config
+from functools import lru_cache
+from typing import TYPE_CHECKING
 
+from src.config.agent_config import get_llm_config
 
-def create_deviation_analyzer_agent() -> AssistantAgent:
-    """Create and configure the Deviation Analyzer Agent."""
+if TYPE_CHECKING:
+    from autogen import AssistantAgent
 
-    llm_config = get_llm_config()
 
-    agent = AssistantAgent(
-        name="deviation_analyzer_agent",
-        system_message="""You are a Deviation Analyzer Agent specialized in analyzing detected deviations.
+_DEVIATION_ANALYZER_SYSTEM_MESSAGE = """You are a Deviation Analyzer Agent specialized in analyzing detected deviations.
 Your role is to:
 1. Perform final cross-checking and deviation analysis
 2. Cross-check with Final Output (Step 3 requirement):
@@ -24,8 +22,18 @@ Your role is to:
 5. Prepare comprehensive findings for Report Generator Agent
 
 You receive match results from Step Matcher Agent and test output from Test Output Parser Agent.
-Analyze the deviations, cross-reference with test output, and prepare findings for report generation.""",
-        llm_config=llm_config
+Analyze the deviations, cross-reference with test output, and prepare findings for report generation."""
+
+
+@lru_cache(maxsize=1)
+def create_deviation_analyzer_agent() -> "AssistantAgent":
+    """Create and configure the Deviation Analyzer Agent."""
+    from autogen import AssistantAgent
+
+    agent = AssistantAgent(
+        name="deviation_analyzer_agent",
+        system_message=_DEVIATION_ANALYZER_SYSTEM_MESSAGE,
+        llm_config=get_llm_config()
     )
 
     return agent
@@ -1,17 +1,26 @@
 """Orchestrator Agent - Coordinates the workflow using AutoGen."""
 
-from autogen import AssistantAgent, GroupChat, GroupChatManager
-from src.config.agent_config import get_llm_config
+import asyncio
+import inspect
+from functools import lru_cache, wraps
+from typing import TYPE_CHECKING
 
+from src.config.agent_config import get_llm_config
+from src.agents.log_parser_agent import create_log_parser_agent
+from src.agents.video_analyzer_agent import create_video_analyzer_agent
+from src.agents.test_output_agent import create_test_output_agent
+from src.agents.step_matcher_agent import create_step_matcher_agent
+from src.agents.deviation_analyzer_agent import create_deviation_analyzer_agent
+from src.agents.report_generator_agent import (
+    REPORT_SAVED_MARKER,
+    create_report_generator_agent
+)
 
-def create_orchestrator_agent() -> AssistantAgent:
-    """Create and configure the Orchestrator Agent."""
+if TYPE_CHECKING:
+    from autogen import AssistantAgent, GroupChatManager
 
-    llm_config = get_llm_config()
 
-    agent = AssistantAgent(
-        name="orchestrator_agent",
-        system_message="""You are the Orchestrator Agent that coordinates the entire video analysis workflow.
+_ORCHESTRATOR_SYSTEM_MESSAGE = """You are the Orchestrator Agent that coordinates the entire video analysis workflow.
 Your role is to:
 1. Coordinate the workflow between specialized agents
 2. Manage conversation flow and task delegation
@@ -23,23 +32,200 @@ Your role is to:
 5. Coordinate report generation (Report Generator Agent)
 
 You delegate tasks to specialized agents and aggregate their results to produce the final deviation report.
-Ensure all agents complete their tasks and communicate results effectively.""",
-        llm_config=llm_config
+Ensure all agents complete their tasks and communicate results effectively.
+Keep each message to a short hand-off naming the next agent and its task; the specialized agents produce the results."""
+
+# The orchestrator's replies only hand work to the next agent and nobody
+# reads them afterwards, so cap how many tokens it may generate
+_ORCHESTRATOR_MAX_TOKENS = 256
+
+
+@lru_cache(maxsize=1)
+def create_orchestrator_agent() -> "AssistantAgent":
+    """Create and configure the Orchestrator Agent."""
+    from autogen import AssistantAgent
+
+    agent = AssistantAgent(
+        name="orchestrator_agent",
+        system_message=_ORCHESTRATOR_SYSTEM_MESSAGE,
+        llm_config={
+            **get_llm_config(),
+            "max_tokens": _ORCHESTRATOR_MAX_TOKENS,
+        }
     )
 
     return agent
 
 
-def create_group_chat(agents: list) -> GroupChatManager:
-    """Create a GroupChat with all agents."""
+_AGENT_FACTORIES = (
+    create_orchestrator_agent,
+    create_log_parser_agent,
+    create_video_analyzer_agent,
+    create_test_output_agent,
+    create_step_matcher_agent,
+    create_deviation_analyzer_agent,
+    create_report_generator_agent,
+)
+
+
+def get_shared_agents() -> list:
+    """Get the process-wide agent instances in workflow order."""
+    return [factory() for factory in _AGENT_FACTORIES]
+
+
+def create_run_agents() -> list:
+    """Build a fresh set of agents in workflow order for a single run.
+
+    Unlike get_shared_agents(), nothing is shared with other runs, so
+    concurrent runs cannot reset each other's conversation state.
+    """
+    return [factory.__wrapped__() for factory in _AGENT_FACTORIES]
+
+
+def reset_agents() -> None:
+    """Drop the cached agents so the next factory call rebuilds them."""
+    for factory in _AGENT_FACTORIES:
+        factory.cache_clear()
+
+
+def _is_report_saved(message: dict) -> bool:
+    """Check whether the report generator has signalled completion."""
+    return REPORT_SAVED_MARKER in (message.get("content") or "")
+
+
+def _route_next_speaker(last_speaker, group_chat):
+    """Pick the next speaker by walking the agents in workflow order.
+
+    An agent that has just requested one of its own tools speaks again so it
+    can execute the call. Otherwise the next agent in ``group_chat.agents``
+    takes over; returning None after the last agent ends the chat. This
+    replaces an LLM call per turn for speaker selection.
+    """
+    message = group_chat.messages[-1] if group_chat.messages else {}
+    if message.get("function_call") or message.get("tool_calls"):
+        return last_speaker
+
+    agents = group_chat.agents
+    index = agents.index(last_speaker) + 1 if last_speaker in agents else 0
+    return agents[index] if index < len(agents) else None
+
+
+def create_group_chat(agents: list = None) -> "GroupChatManager":
+    """Create a GroupChat with all agents.
+
+    A new GroupChat is built on every call so message history never leaks
+    between runs. A group chat keeps its conversation state on the agents
+    themselves, so by default every call gets its own agents (see
+    create_run_agents) and concurrent chats cannot wipe each other's
+    state. Agents passed in are reset first and must not be in use by
+    another chat at the same time. Speakers follow the order of
+    ``agents`` (see _route_next_speaker).
+    """
+    from autogen import GroupChat, GroupChatManager
+
+    if agents is None:
+        agents = create_run_agents()
+    else:
+        # Caller-supplied agents may carry state from an earlier run
+        for agent in agents:
+            agent.reset()
+
     group_chat = GroupChat(
         agents=agents,
         messages=[],
-        max_round=50
+        # Room for every agent to speak and run one tool call
+        max_round=2 * len(agents),
+        speaker_selection_method=_route_next_speaker
     )
     manager = GroupChatManager(
         groupchat=group_chat,
-        llm_config=get_llm_config()
+        llm_config=get_llm_config(),
+        is_termination_msg=_is_report_saved,
+        max_consecutive_auto_reply=3
     )
     return manager
 
+
+def _run_in_thread(func):
+    """Wrap a blocking tool function so AutoGen awaits it in a worker thread."""
+    if inspect.iscoroutinefunction(func):
+        return func
+
+    @wraps(func)
+    async def wrapper(**kwargs):
+        return await asyncio.to_thread(func, **kwargs)
+    return wrapper
+
+
+def create_orchestrator_graph(max_turns: int = 4):
+    """Create the agent workflow as a DAG of async steps.
+
+    Log parsing, video analysis and test output parsing are independent, so
+    their agents run concurrently; the results then flow through the step
+    matcher, deviation analyzer and report generator in order.
+
+    Returns:
+        Coroutine function ``run(log_path, video_paths, test_output_path,
+        output_path, output_format="markdown")`` returning the report
+        generator's final message.
+    """
+    from autogen import UserProxyAgent
+
+    async def ask(agent, message: str) -> str:
+        # Tools run off the event loop so a long video decode doesn't block
+        # the other branches
+        proxy = UserProxyAgent(
+            name=f"{agent.name}_proxy",
+            human_input_mode="NEVER",
+            code_execution_config=False,
+            function_map={
+                name: _run_in_thread(func)
+                for name, func in agent.function_map.items()
+            },
+        )
+        result = await proxy.a_initiate_chat(
+            agent,
+            message=message,
+            max_turns=max_turns,
+            silent=True,
+        )
+        return result.summary
+
+    async def run(
+        log_path: str,
+        video_paths: list,
+        test_output_path: str,
+        output_path: str,
+        output_format: str = "markdown",
+    ) -> str:
+        # Step 1, Step 2 and the test output half of Step 3 in parallel
+        log_summary, video_summary, test_summary = await asyncio.gather(
+            ask(create_log_parser_agent(), f"Parse the planning log at {log_path}."),
+            ask(
+                create_video_analyzer_agent(),
+                f"Process the videos {video_paths} and return the unified timeline.",
+            ),
+            ask(create_test_output_agent(), f"Parse the test output at {test_output_path}."),
+        )
+
+        match_summary = await ask(
+            create_step_matcher_agent(),
+            "Match the planned steps against the video timeline.\n\n"
+            f"Planned steps:\n{log_summary}\n\n"
+            f"Video timeline:\n{video_summary}\n\n"
+            f"Test output:\n{test_summary}",
+        )
+        findings = await ask(
+            create_deviation_analyzer_agent(),
+            "Analyze these deviations and cross-check them with the test output.\n\n"
+            f"Match results:\n{match_summary}\n\n"
+            f"Test output:\n{test_summary}",
+        )
+        return await ask(
+            create_report_generator_agent(),
+            f"Generate a {output_format} deviation report and save it to {output_path}.\n\n"
+            f"Match results:\n{match_summary}\n\n"
+            f"Findings:\n{findings}",
+        )
+
+    return run
@@ -1,154 +1,189 @@
 """Video Analyzer Agent - Analyzes video evidence using AutoGen."""
 
-from autogen import AssistantAgent
+import asyncio
+from functools import lru_cache
+from itertools import chain, islice
+from typing import TYPE_CHECKING
+
 from src.config.agent_config import get_llm_config
 from src.tools.video_analyzer import (
     extract_frames,
     extract_key_frames,
+    iter_frames,
     process_multiple_videos,
     merge_video_timelines,
     get_video_info
 )
 from src.tools.action_detector import (
+    aiter_analyzed_frames,
     analyze_frames,
-    build_action_timeline
+    build_action_timeline,
+    iter_analyzed_frames
 )
 
+if TYPE_CHECKING:
+    from autogen import AssistantAgent
+
+
+_VIDEO_ANALYZER_SYSTEM_MESSAGE = """You are a Video Analyzer Agent specialized in analyzing video evidence from Hercules test runs.
+Your role is to:
+1. Extract frames from video files at regular intervals (1-2 seconds)
+2. Extract key frames at scene changes/action boundaries
+3. Use vision API to analyze frames for UI elements, text content, and visible actions
+4. Build comprehensive timeline of observed actions
+5. Handle multiple videos and coordinate coverage (merge timelines, handle overlapping actions)
+
+Use the video analysis functions to process videos and build action timelines.
+For more than one video, call process_videos once with all paths instead of analyzing each video separately.
+Return structured timelines with timestamps, detected actions, UI elements, and text content."""
+
+# Function schemas registered with the agent
+_VIDEO_ANALYZER_FUNCTIONS = (
+    {
+        "name": "extract_video_frames",
+        "description": "Extract frames from video at regular intervals",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "video_path": {
+                    "type": "string",
+                    "description": "Path to video file"
+                },
+                "interval_seconds": {
+                    "type": "number",
+                    "description": "Interval between frames in seconds (default: 2.0)",
+                    "default": 2.0
+                }
+            },
+            "required": ["video_path"]
+        }
+    },
+    {
+        "name": "analyze_video_frames",
+        "description": "Extract and analyze frames from video to build action timeline",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "video_path": {
+                    "type": "string",
+                    "description": "Path to video file"
+                },
+                "interval_seconds": {
+                    "type": "number",
+                    "description": "Interval between frames in seconds (default: 2.0)",
+                    "default": 2.0
+                }
+            },
+            "required": ["video_path"]
+        }
+    },
+    {
+        "name": "process_videos",
+        "description": "Analyze multiple videos and return one merged action timeline for full coverage",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "video_paths": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "List of video file paths"
+                },
+                "interval_seconds": {
+                    "type": "number",
+                    "description": "Interval between frames in seconds (default: 2.0)",
+                    "default": 2.0
+                }
+            },
+            "required": ["video_paths"]
+        }
+    },
+    {
+        "name": "get_video_metadata",
+        "description": "Get video metadata (fps, duration, dimensions)",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "video_path": {
+                    "type": "string",
+                    "description": "Path to video file"
+                }
+            },
+            "required": ["video_path"]
+        }
+    },
+)
 
-def create_video_analyzer_agent() -> AssistantAgent:
-    """Create and configure the Video Analyzer Agent."""
 
-    llm_config = get_llm_config()
+@lru_cache(maxsize=1)
+def create_video_analyzer_agent() -> "AssistantAgent":
+    """Create and configure the Video Analyzer Agent."""
+    from autogen import AssistantAgent
 
     # Define video analysis functions
     def extract_video_frames(video_path: str, interval_seconds: float = 2.0) -> list:
         """Extract frames from video at regular intervals."""
-        frames = extract_frames(video_path, interval_seconds)
-        # Convert numpy arrays to serializable format
-        return [
-            {
-                "frame_number": f["frame_number"],
-                "timestamp": f["timestamp"],
-                "timestamp_formatted": f["timestamp_formatted"],
-            }
-            for f in frames
-        ]
+        # Only metadata is serializable, so skip decoding the images
+        return extract_frames(video_path, interval_seconds, include_frames=False)
 
     def analyze_video_frames(video_path: str, interval_seconds: float = 2.0) -> dict:
         """Extract and analyze frames from video."""
-        frames = extract_frames(video_path, interval_seconds)
-        analyzed = analyze_frames(frames)
-        timeline = build_action_timeline(analyzed)
+        # Stream frames through concurrent analysis so only the frames with
+        # requests in flight are held in memory
+        frames_extracted = 0
+        timeline = []
+
+        def record(analyzed: dict) -> None:
+            nonlocal frames_extracted
+            frames_extracted += 1
+            timeline.extend(build_action_timeline([analyzed]))
+
+        async def analyze() -> None:
+            async for analyzed in aiter_analyzed_frames(iter_frames(video_path, interval_seconds)):
+                record(analyzed)
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(analyze())
+        else:
+            # Called on a running event loop (e.g. a group chat driven by
+            # a_initiate_chat), where asyncio.run is not allowed: analyze
+            # the frames sequentially instead
+            for analyzed in iter_analyzed_frames(iter_frames(video_path, interval_seconds)):
+                record(analyzed)
         return {
             "video_path": video_path,
-            "frames_extracted": len(frames),
+            "frames_extracted": frames_extracted,
             "timeline": timeline,
         }
 
     def process_videos(video_paths: list, interval_seconds: float = 2.0) -> dict:
-        """Process multiple videos and merge timelines."""
+        """Process multiple videos and merge their action timelines."""
         video_frames = process_multiple_videos(video_paths, interval_seconds)
-        unified_timeline = merge_video_timelines(video_frames)
+        # Analyze every video here so all results go back in one reply,
+        # rather than one analyze_video_frames round trip per video. All
+        # frames go through one analyze_frames batch and are split back
+        # per video (results keep input order)
+        analyzed = iter(analyze_frames(chain.from_iterable(video_frames.values())))
+        analyzed_frames = merge_video_timelines({
+            video_path: list(islice(analyzed, len(frames)))
+            for video_path, frames in video_frames.items()
+        })
         return {
             "videos_processed": len(video_frames),
-            "unified_timeline": unified_timeline,
+            "unified_timeline": build_action_timeline(analyzed_frames),
         }
 
     def get_video_metadata(video_path: str) -> dict:
         """Get video metadata."""
         return get_video_info(video_path)
 
-    # Register functions
-    functions = [
-        {
-            "name": "extract_video_frames",
-            "description": "Extract frames from video at regular intervals",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "video_path": {
-                        "type": "string",
-                        "description": "Path to video file"
-                    },
-                    "interval_seconds": {
-                        "type": "number",
-                        "description": "Interval between frames in seconds (default: 2.0)",
-                        "default": 2.0
-                    }
-                },
-                "required": ["video_path"]
-            }
-        },
-        {
-            "name": "analyze_video_frames",
-            "description": "Extract and analyze frames from video to build action timeline",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "video_path": {
-                        "type": "string",
-                        "description": "Path to video file"
-                    },
-                    "interval_seconds": {
-                        "type": "number",
-                        "description": "Interval between frames in seconds (default: 2.0)",
-                        "default": 2.0
-                    }
-                },
-                "required": ["video_path"]
-            }
-        },
-        {
-            "name": "process_videos",
-            "description": "Process multiple videos and merge timelines for full coverage",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "video_paths": {
-                        "type": "array",
-                        "items": {"type": "string"},
-                        "description": "List of video file paths"
-                    },
-                    "interval_seconds": {
-                        "type": "number",
-                        "description": "Interval between frames in seconds (default: 2.0)",
-                        "default": 2.0
-                    }
-                },
-                "required": ["video_paths"]
-            }
-        },
-        {
-            "name": "get_video_metadata",
-            "description": "Get video metadata (fps, duration, dimensions)",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "video_path": {
-                        "type": "string",
-                        "description": "Path to video file"
-                    }
-                },
-                "required": ["video_path"]
-            }
-        }
-    ]
-
     agent = AssistantAgent(
         name="video_analyzer_agent",
-        system_message="""You are a Video Analyzer Agent specialized in analyzing video evidence from Hercules test runs.
-Your role is to:
-1. Extract frames from video files at regular intervals (1-2 seconds)
-2. Extract key frames at scene changes/action boundaries
-3. Use vision API to analyze frames for UI elements, text content, and visible actions
-4. Build comprehensive timeline of observed actions
-5. Handle multiple videos and coordinate coverage (merge timelines, handle overlapping actions)
-
-Use the video analysis functions to process videos and build action timelines.
-Return structured timelines with timestamps, detected actions, UI elements, and text content.""",
+        system_message=_VIDEO_ANALYZER_SYSTEM_MESSAGE,
         llm_config={
-            **llm_config,
-            "functions": functions,
+            **get_llm_config(),
+            "functions": list(_VIDEO_ANALYZER_FUNCTIONS),
         },
         function_map={
             "extract_video_frames": extract_video_frames,
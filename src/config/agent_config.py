@@ -1,9 +1,13 @@
 """AutoGen agent configuration with Groq API setup."""
 
+import asyncio
 import os
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
 
 from dotenv import load_dotenv
-from openai import OpenAI
 
 # Load environment variables
 load_dotenv()
@@ -14,39 +18,171 @@ GROQ_BASE_URL = "https://api.groq.com/openai/v1"
 GROQ_MODEL = "openai/gpt-oss-120b"
 GROQ_VISION_MODEL = "llama-3.2-11b-vision-preview"
 
-# Validate API key is set
-if not GROQ_API_KEY:
-    raise ValueError(
-        "GROQ_API_KEY environment variable is not set. "
-        "Please create a .env file with your Groq API key. "
-        "See .env.example for reference."
+# LLM response cache (AutoGen's built-in disk cache)
+LLM_CACHE_SEED = 42
+LLM_CACHE_PATH = ".autogen_cache"
+
+
+@dataclass(frozen=True, slots=True)
+class GroqSettings:
+    """Groq connection settings, read from the environment once."""
+
+    api_key: Optional[str]
+    base_url: str = GROQ_BASE_URL
+    model: str = GROQ_MODEL
+    vision_model: str = GROQ_VISION_MODEL
+
+    @classmethod
+    def from_env(cls) -> "GroqSettings":
+        return cls(api_key=os.getenv("GROQ_API_KEY"))
+
+
+_SETTINGS = GroqSettings.from_env()
+
+
+def get_settings() -> GroqSettings:
+    """Get the current Groq settings."""
+    return _SETTINGS
+
+
+def reload_settings() -> GroqSettings:
+    """Re-read settings from the environment (mainly for tests).
+
+    Also drops the cached configs and client so they pick up the change.
+    """
+    global _SETTINGS
+    _SETTINGS = GroqSettings.from_env()
+    get_llm_config.cache_clear()
+    get_llm_config_with_client.cache_clear()
+    _get_groq_client.cache_clear()
+    return _SETTINGS
+
+
+def _require_api_key() -> str:
+    """Return the Groq API key, failing if it is not configured.
+
+    Validation happens on first use rather than at import time so tools
+    that never talk to Groq (e.g. the log parser) work without a key.
+    """
+    if not _SETTINGS.api_key:
+        raise ValueError(
+            "GROQ_API_KEY environment variable is not set. "
+            "Please create a .env file with your Groq API key. "
+            "See .env.example for reference."
+        )
+    return _SETTINGS.api_key
+
+
+@lru_cache(maxsize=1)
+def get_http_client():
+    """Get the pooled HTTP client shared by every Groq request.
+
+    Passing one client to all agents lets them reuse keep-alive connections
+    instead of each opening its own pool and paying a TLS handshake.
+    """
+    import httpx
+
+    class SharedClient(httpx.Client):
+        # AutoGen deep-copies llm_config per agent; keep the single pool
+        def __deepcopy__(self, memo):
+            return self
+
+    return SharedClient(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        timeout=60.0,
+    )
+
+
+# An httpx.AsyncClient's connections belong to the event loop that opened
+# them, so async callers share one pool per running loop
+_async_http_clients = {}
+_async_http_clients_lock = threading.Lock()
+
+
+def get_async_http_client():
+    """Get the pooled async HTTP client of the running event loop.
+
+    The async counterpart of get_http_client(): requests made on one loop
+    reuse the same keep-alive connections. Pools of loops that have since
+    closed are dropped.
+    """
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    with _async_http_clients_lock:
+        for closed in [other for other in _async_http_clients if other.is_closed()]:
+            del _async_http_clients[closed]
+        client = _async_http_clients.get(loop)
+        if client is None:
+            client = _async_http_clients[loop] = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                timeout=60.0,
+            )
+    return client
+
+
+@lru_cache(maxsize=1)
+def _get_groq_client():
+    """Create the OpenAI-compatible client for the Groq endpoint."""
+    from openai import OpenAI
+
+    return OpenAI(
+        api_key=_require_api_key(),
+        base_url=_SETTINGS.base_url,
+        http_client=get_http_client(),
     )
 
-# Initialize OpenAI-compatible client with Groq endpoint
-groq_client = OpenAI(api_key=GROQ_API_KEY, base_url=GROQ_BASE_URL)
+
+def __getattr__(name):
+    # Lazily expose `groq_client` so importing this module stays cheap
+    if name == "groq_client":
+        return _get_groq_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # AutoGen LLM Configuration
+@lru_cache(maxsize=1)
 def get_llm_config():
-    """Get LLM configuration for AutoGen agents."""
+    """Get LLM configuration for AutoGen agents.
+
+    The same dict is returned on every call and shared by all agents, so
+    callers must treat it as read-only (AutoGen deep-copies it internally).
+    """
     return {
-        "model": GROQ_MODEL,
-        "api_key": GROQ_API_KEY,
-        "base_url": GROQ_BASE_URL,
+        "model": _SETTINGS.model,
+        "api_key": _require_api_key(),
+        "base_url": _SETTINGS.base_url,
         "api_type": "openai",
+        "http_client": get_http_client(),
+        "cache_seed": LLM_CACHE_SEED,
     }
 
 
 # Alternative configuration using client directly
+@lru_cache(maxsize=1)
 def get_llm_config_with_client():
-    """Get LLM configuration with OpenAI client for AutoGen agents."""
+    """Get LLM configuration with OpenAI client for AutoGen agents.
+
+    Cached like get_llm_config(); treat the returned dict as read-only.
+    """
     return {
-        "model": GROQ_MODEL,
-        "client": groq_client,
+        "model": _SETTINGS.model,
+        "client": _get_groq_client(),
     }
 
 
+def get_llm_cache():
+    """Get the disk cache for LLM responses.
+
+    Use as a context manager around a chat, passing it as ``cache=`` to
+    ``initiate_chat`` so repeated identical requests are served from disk.
+    """
+    from autogen import Cache
+
+    return Cache.disk(cache_seed=LLM_CACHE_SEED, cache_path_root=LLM_CACHE_PATH)
+
+
 # Vision Model Configuration
 def get_vision_model():
     """Get vision model name for Groq API."""
-    return GROQ_VISION_MODEL
+    return _SETTINGS.vision_model
@@ -1,7 +1,9 @@
 """Main entry point for Video Analysis Agent."""
 
 import argparse
+import asyncio
 import json
+import os
 from pathlib import Path
 from typing import List, Optional
 from rich.console import Console
@@ -15,12 +17,11 @@ from src.agents.deviation_analyzer_agent import create_deviation_analyzer_agent
 from src.agents.report_generator_agent import create_report_generator_agent
 from src.agents.orchestrator_agent import create_orchestrator_agent, create_group_chat
 
+from src.pipeline.direct import analyze_videos
 from src.tools.log_parser import parse_planning_log
 from src.tools.test_output_parser import parse_test_output
-from src.tools.video_analyzer import process_multiple_videos, merge_video_timelines
-from src.tools.action_detector import analyze_frames, build_action_timeline
 from src.tools.step_matcher import match_all_steps
-from src.tools.report_generator import generate_deviation_report, save_report
+from src.tools.report_generator import write_deviation_report
 
 console = Console()
 
@@ -67,73 +68,85 @@ def main():
         action="store_true",
         help="Use AutoGen agents for processing (experimental)"
     )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="Directory of on-disk caches; frames and steps analyzed by an "
+             "earlier run reuse that run's vision API results and match "
+             "scores (off by default)"
+    )
 
     args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+async def _analyze_videos(video_paths: List[str], cache_dir: Optional[str] = None):
+    """Extract and analyze frames from every video; returns (video count, timeline)."""
+    # The direct pipeline's analysis runs in a worker thread, where it has
+    # an event loop of its own for the concurrent vision requests
+    timeline = await asyncio.to_thread(analyze_videos, video_paths, 2.0, cache_dir)
+    # Like process_multiple_videos, count each existing video once
+    video_count = sum(1 for path in dict.fromkeys(video_paths) if os.path.exists(path))
+    return video_count, timeline
 
+
+async def main_async(args: argparse.Namespace):
+    """Run the analysis pipeline for parsed command line arguments."""
     console.print("[bold blue]Video Analysis Agent[/bold blue]")
     console.print("=" * 50)
+    if args.cache_dir:
+        os.makedirs(args.cache_dir, exist_ok=True)
+        console.print(f"Reusing cached results from: {args.cache_dir}")
 
-    # Step 1: Parse Planning Log
-    console.print("\n[bold]Step 1: Parsing Planning Log[/bold]")
+    # Steps 1-3 are independent, so the log and test output are parsed
+    # while the (much slower) video analysis runs
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
         console=console
     ) as progress:
-        task = progress.add_task("Parsing planning log...", total=None)
-        try:
-            planning_data = parse_planning_log(args.log)
+        log_task = progress.add_task("Parsing planning log...", total=None)
+        video_task = progress.add_task("Processing video(s)...", total=None)
+        test_task = progress.add_task("Parsing test output...", total=None)
+
+        async def track(task, coro):
+            result = await coro
             progress.update(task, completed=True)
-            console.print(f"  ✓ Extracted {planning_data['total_steps']} planned steps")
-            console.print(f"  ✓ Found {planning_data['total_assertions']} assertions")
-        except Exception as e:
-            console.print(f"  ✗ Error parsing planning log: {e}")
-            return
+            return result
 
-    # Step 2: Analyze Video(s)
-    console.print("\n[bold]Step 2: Analyzing Video(s)[/bold]")
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        console=console
-    ) as progress:
-        task = progress.add_task("Processing video(s)...", total=None)
-        try:
-            # Process videos
-            video_frames = process_multiple_videos(args.video, interval_seconds=2.0)
+        planning_data, video_result, test_output = await asyncio.gather(
+            track(log_task, asyncio.to_thread(parse_planning_log, args.log)),
+            track(video_task, _analyze_videos(args.video, args.cache_dir)),
+            track(test_task, asyncio.to_thread(parse_test_output, args.test_output)),
+            return_exceptions=True,
+        )
 
-            # Analyze frames (placeholder - would use vision API in production)
-            all_frames = []
-            for video_path, frames in video_frames.items():
-                analyzed = analyze_frames(frames)
-                all_frames.extend(analyzed)
+    # Step 1: Parse Planning Log
+    console.print("\n[bold]Step 1: Parsing Planning Log[/bold]")
+    if isinstance(planning_data, Exception):
+        console.print(f"  ✗ Error parsing planning log: {planning_data}")
+        return
+    console.print(f"  ✓ Extracted {planning_data['total_steps']} planned steps")
+    console.print(f"  ✓ Found {planning_data['total_assertions']} assertions")
 
-            # Build timeline
-            timeline = build_action_timeline(all_frames)
-            progress.update(task, completed=True)
-            console.print(f"  ✓ Processed {len(video_frames)} video(s)")
-            console.print(f"  ✓ Built timeline with {len(timeline)} action points")
-        except Exception as e:
-            console.print(f"  ✗ Error analyzing video: {e}")
-            return
+    # Step 2: Analyze Video(s)
+    console.print("\n[bold]Step 2: Analyzing Video(s)[/bold]")
+    if isinstance(video_result, Exception):
+        console.print(f"  ✗ Error analyzing video: {video_result}")
+        return
+    video_count, timeline = video_result
+    console.print(f"  ✓ Processed {video_count} video(s)")
+    console.print(f"  ✓ Built timeline with {len(timeline)} action points")
 
     # Step 3: Parse Test Output
     console.print("\n[bold]Step 3: Parsing Test Output[/bold]")
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        console=console
-    ) as progress:
-        task = progress.add_task("Parsing test output...", total=None)
-        try:
-            test_output = parse_test_output(args.test_output)
-            progress.update(task, completed=True)
-            console.print(f"  ✓ Test outcome: {test_output['test_outcome']}")
-            if test_output.get('failures'):
-                console.print(f"  ✓ Found {len(test_output['failures'])} failure(s)")
-        except Exception as e:
-            console.print(f"  ✗ Error parsing test output: {e}")
-            return
+    if isinstance(test_output, Exception):
+        console.print(f"  ✗ Error parsing test output: {test_output}")
+        return
+    console.print(f"  ✓ Test outcome: {test_output['test_outcome']}")
+    if test_output.get('failures'):
+        console.print(f"  ✓ Found {len(test_output['failures'])} failure(s)")
 
     # Step 4: Match Steps
     console.print("\n[bold]Step 4: Matching Steps with Video Evidence[/bold]")
@@ -144,7 +157,10 @@ def main():
     ) as progress:
         task = progress.add_task("Matching steps...", total=None)
         try:
-            match_results = match_all_steps(planning_data['steps'], timeline, threshold=0.5)
+            match_results = match_all_steps(
+                planning_data['steps'], timeline, threshold=0.5,
+                cache_path=os.path.join(args.cache_dir, "match") if args.cache_dir else None,
+            )
             progress.update(task, completed=True)
             observed = sum(1 for r in match_results if r.get("result") == "observed")
             deviations = len(match_results) - observed
@@ -163,12 +179,12 @@ def main():
     ) as progress:
         task = progress.add_task("Generating report...", total=None)
         try:
-            report_content = generate_deviation_report(
+            write_deviation_report(
                 match_results,
+                args.output,
                 test_output,
                 output_format=args.format
             )
-            save_report(report_content, args.output)
             progress.update(task, completed=True)
             console.print(f"  ✓ Report generated: {args.output}")
         except Exception as e:
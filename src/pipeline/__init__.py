@@ -0,0 +1,2 @@
+"""Pipelines that run the video analysis workflow end to end."""
+
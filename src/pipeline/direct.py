@@ -0,0 +1,111 @@
+"""Direct-call pipeline - runs the analysis tools without AutoGen agents."""
+
+import os
+import tempfile
+from itertools import chain
+from typing import Any, Dict, List, Optional
+
+from src.tools.log_parser import parse_planning_log
+from src.tools.test_output_parser import parse_test_output
+from src.tools.video_analyzer import process_multiple_videos
+from src.tools.action_detector import (
+    DEFAULT_MAX_IMAGE_DIM,
+    analyze_frames,
+    build_action_timeline,
+)
+from src.tools.step_matcher import match_all_steps
+from src.tools.report_generator import write_deviation_report
+
+
+def analyze_videos(
+    video_paths: List[str],
+    interval_seconds: float = 2.0,
+    cache_dir: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Extract and analyze frames from all videos and build the action timeline.
+
+    Args:
+        video_paths: List of video file paths
+        interval_seconds: Interval between frames in seconds
+        cache_dir: Optional directory of on-disk caches; frames analyzed
+            by an earlier run reuse that run's vision API results
+
+    Returns:
+        Timeline of observed actions across all videos
+    """
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # Sampled frames are kept as JPEG files rather than decoded arrays
+    # until the vision requests read them, already at the size the vision
+    # model is sent
+    with tempfile.TemporaryDirectory(prefix="frames_") as frames_dir:
+        video_frames = process_multiple_videos(
+            video_paths, interval_seconds=interval_seconds,
+            output_dir=frames_dir, max_dim=DEFAULT_MAX_IMAGE_DIM,
+        )
+
+        # One analyze_frames call keeps the vision requests of all videos in a
+        # single concurrency window instead of draining it per video
+        all_frames = analyze_frames(
+            chain.from_iterable(video_frames.values()), skip_empty=True,
+            cache_path=os.path.join(cache_dir, "vision") if cache_dir else None,
+        )
+
+    return build_action_timeline(all_frames)
+
+
+def run(
+    log_path: str,
+    video_paths: List[str],
+    test_output_path: str,
+    report_path: str,
+    output_format: str = "markdown",
+    interval_seconds: float = 2.0,
+    threshold: float = 0.5,
+    cache_dir: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Run the full analysis pipeline by calling the tool functions directly.
+
+    Every step is deterministic, so no agent turns (and no orchestration
+    LLM calls) sit between them; the vision API is the only remote call.
+
+    Args:
+        log_path: Path to agent_inner_logs.json file
+        video_paths: List of video file paths
+        test_output_path: Path to test_result.xml or test_result.html
+        report_path: Output path for the deviation report
+        output_format: Report format ("markdown" or "html")
+        interval_seconds: Interval between analyzed frames in seconds
+        threshold: Minimum similarity threshold for step matching
+        cache_dir: Optional directory of on-disk caches (off by default)
+
+    Returns:
+        Dictionary containing planning_data, timeline, test_output,
+        match_results and report_path
+    """
+    planning_data = parse_planning_log(log_path)
+    timeline = analyze_videos(video_paths, interval_seconds=interval_seconds, cache_dir=cache_dir)
+    test_output = parse_test_output(test_output_path)
+
+    match_results = match_all_steps(
+        planning_data["steps"], timeline, threshold=threshold,
+        cache_path=os.path.join(cache_dir, "match") if cache_dir else None,
+    )
+
+    write_deviation_report(
+        match_results,
+        report_path,
+        test_output,
+        output_format=output_format
+    )
+
+    return {
+        "planning_data": planning_data,
+        "timeline": timeline,
+        "test_output": test_output,
+        "match_results": match_results,
+        "report_path": report_path,
+    }
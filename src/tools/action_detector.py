@@ -1,31 +1,156 @@
 """Detect actions in video frames using vision API."""
 
+import asyncio
 import base64
+import dbm
+import hashlib
 import io
+import json
 import os
-from typing import Any, Dict, List, Optional
+import re
+import shelve
+import time
+from collections import deque
+from contextlib import nullcontext
+from functools import lru_cache
+from typing import Any, AsyncIterator, ContextManager, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import cv2
 import numpy as np
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI, NotFoundError, OpenAI
+from PIL import Image
 
-from src.config.agent_config import get_vision_model
+from src.config.agent_config import get_async_http_client, get_http_client, get_vision_model
+from src.tools.video_analyzer import FRAME_JPEG_QUALITY, downscale_frame
 
 load_dotenv()
 
 
-def encode_frame_to_base64(frame: np.ndarray) -> str:
-    """Encode frame image to base64 string."""
-    _, buffer = cv2.imencode(".jpg", frame)
-    img_bytes = buffer.tobytes()
-    img_base64 = base64.b64encode(img_bytes).decode("utf-8")
-    return img_base64
+# A decoded frame, or a frame that is already JPEG-encoded
+FrameImage = Union[np.ndarray, bytes]
+
+# UI screenshots compress well and the vision model does not need more.
+# Frames the video analyzer writes to disk use the same quality, so their
+# bytes can be sent without re-encoding
+DEFAULT_JPEG_QUALITY = FRAME_JPEG_QUALITY
+# Longest image edge sent to the vision model, which downsamples larger
+# images itself; bigger frames only cost upload time and image tokens
+DEFAULT_MAX_IMAGE_DIM = 1024
+
+
+def encode_frame_to_base64(
+    frame: FrameImage,
+    quality: int = DEFAULT_JPEG_QUALITY,
+    max_dim: Optional[int] = DEFAULT_MAX_IMAGE_DIM,
+) -> str:
+    """Encode frame image to base64 string.
+
+    Frames larger than `max_dim` on their long edge are downscaled first
+    (None keeps the full resolution). JPEG bytes (e.g. frames the video
+    analyzer wrote to an output_dir) that already fit are passed through
+    as-is; only their header is read to check the size. Larger ones are
+    decoded, downscaled and re-encoded like arrays.
+    """
+    if isinstance(frame, (bytes, bytearray, memoryview)):
+        if max_dim is None or max(Image.open(io.BytesIO(frame)).size) <= max_dim:
+            return base64.b64encode(frame).decode("ascii")
+        frame = cv2.imdecode(np.frombuffer(frame, np.uint8), cv2.IMREAD_COLOR)
+    frame = downscale_frame(frame, max_dim)
+    _, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    # b64encode reads the encoded ndarray through the buffer protocol
+    return base64.b64encode(buffer).decode("ascii")
+
+
+DEFAULT_VISION_PROMPT = "Describe what actions are visible in this screenshot. Focus on UI interactions like clicks, text input, navigation, filtering, etc. Also identify UI elements like buttons, input fields, icons, and any visible text."
+
+
+def _build_vision_messages(frame: FrameImage, prompt: Optional[str]) -> List[Dict[str, Any]]:
+    """Build the OpenAI-compatible chat messages for a single frame."""
+    img_base64 = encode_frame_to_base64(frame)
+    return [
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": prompt or DEFAULT_VISION_PROMPT},
+                {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": f"data:image/jpeg;base64,{img_base64}"
+                    },
+                },
+            ],
+        }
+    ]
+
+
+# Heading the model is asked to put before its answer for each image of a
+# multi-image request
+_IMAGE_SECTION_RE = re.compile(r"^[\s#*]*Image\s+(\d+)\s*[:.)\-]", re.IGNORECASE | re.MULTILINE)
+
+
+def _build_multi_image_messages(frames: List[FrameImage], prompt: Optional[str]) -> List[Dict[str, Any]]:
+    """Build the chat messages for several frames analyzed in one request."""
+    instruction = (
+        f"You are given {len(frames)} screenshots, in order. For each one, "
+        "start a new section with a line 'Image <n>:' (n counts from 1) and "
+        "answer the following for that screenshot only.\n\n"
+        + (prompt or DEFAULT_VISION_PROMPT)
+    )
+    content: List[Dict[str, Any]] = [{"type": "text", "text": instruction}]
+    for frame in frames:
+        content.append({
+            "type": "image_url",
+            "image_url": {"url": f"data:image/jpeg;base64,{encode_frame_to_base64(frame)}"},
+        })
+    return [{"role": "user", "content": content}]
+
+
+def _split_image_sections(description: str, count: int) -> Optional[List[str]]:
+    """Split a multi-image answer into one description per image, or None if it does not have exactly one section per image."""
+    headings = list(_IMAGE_SECTION_RE.finditer(description))
+    if [int(m.group(1)) for m in headings] != list(range(1, count + 1)):
+        return None
+    ends = [m.start() for m in headings[1:]] + [len(description)]
+    return [description[m.end():end].strip() for m, end in zip(headings, ends)]
+
+
+def _analysis_from_description(description: str) -> Dict[str, Any]:
+    """Process a vision API description through the extraction functions."""
+    return {"description": description, **extract_all(description)}
+
+
+def _analysis_error(e: Exception) -> Dict[str, Any]:
+    """Empty analysis result carrying the error message."""
+    return {
+        "error": str(e),
+        "description": f"Error analyzing frame: {str(e)}",
+        "ui_elements": [],
+        "actions": [],
+        "text_content": [],
+        "notes": f"Vision API call failed: {str(e)}",
+    }
+
+
+# Rate limits (429) and transient 5xx/connection errors are retried with
+# the OpenAI client's exponential backoff before a frame is given up on
+VISION_MAX_RETRIES = 5
+
+
+@lru_cache(maxsize=8)
+def _get_client(api_key: Optional[str], base_url: str) -> OpenAI:
+    """Get a vision API client, reused across frames for keep-alive."""
+    return OpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        http_client=get_http_client(),
+        max_retries=VISION_MAX_RETRIES,
+    )
 
 
 def analyze_frame_with_vision_api(
-    frame: np.ndarray,
-    prompt: str = "Describe what actions are visible in this screenshot. Focus on UI interactions like clicks, text input, navigation, filtering, etc. Also identify UI elements like buttons, input fields, icons, and any visible text.",
+    frame: FrameImage,
+    prompt: str = DEFAULT_VISION_PROMPT,
     api_key: Optional[str] = None,
     base_url: Optional[str] = None,
 ) -> Dict[str, Any]:
@@ -33,7 +158,7 @@ def analyze_frame_with_vision_api(
     Analyze a single frame using vision API.
 
     Args:
-        frame: Frame image as numpy array
+        frame: Frame image as numpy array or JPEG bytes
         prompt: Prompt for vision API
         api_key: API key (defaults to GROQ_API_KEY env var)
         base_url: Base URL (defaults to Groq API)
@@ -45,172 +170,778 @@ def analyze_frame_with_vision_api(
     api_key = api_key or os.getenv("GROQ_API_KEY")
     base_url = base_url or "https://api.groq.com/openai/v1"
 
-    client = OpenAI(api_key=api_key, base_url=base_url)
-
-    # Encode frame to base64
-    img_base64 = encode_frame_to_base64(frame)
+    client = _get_client(api_key, base_url)
 
     try:
-        # Get vision model from configuration
-        vision_model = get_vision_model()
-
         # Call Groq Vision API using OpenAI-compatible format
         api_response = client.chat.completions.create(
-            model=vision_model,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{img_base64}"
-                            },
-                        },
-                    ],
-                }
-            ],
+            model=get_vision_model(),
+            messages=_build_vision_messages(frame, prompt),
         )
 
         # Extract description from API response
         description = api_response.choices[0].message.content
+        return _analysis_from_description(description)
+
+    except Exception as e:
+        # Graceful error handling - return empty results with error message
+        return _analysis_error(e)
 
-        # Process the description through extraction functions
-        response = {
-            "description": description,
-            "ui_elements": extract_ui_elements(description),
-            "actions": extract_actions(description),
-            "text_content": extract_text_content(description),
-        }
 
-        return response
+@lru_cache(maxsize=8)
+def _get_async_client(api_key: Optional[str], base_url: str, http_client: Any) -> AsyncOpenAI:
+    """Get an async vision API client over a loop's pool (see get_async_http_client)."""
+    return AsyncOpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        http_client=http_client,
+        max_retries=VISION_MAX_RETRIES,
+    )
+
+
+async def analyze_frame_with_vision_api_async(
+    frame: FrameImage,
+    client: AsyncOpenAI,
+    prompt: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Analyze a single frame using vision API without blocking the event loop.
+
+    Args:
+        frame: Frame image as numpy array or JPEG bytes
+        client: Async OpenAI-compatible client for the vision API
+        prompt: Prompt for vision API (defaults to DEFAULT_VISION_PROMPT)
+
+    Returns:
+        Dictionary with analysis results
+    """
+    try:
+        api_response = await client.chat.completions.create(
+            model=get_vision_model(),
+            messages=_build_vision_messages(frame, prompt),
+        )
+        description = api_response.choices[0].message.content
+        return _analysis_from_description(description)
 
     except Exception as e:
-        # Graceful error handling - return empty results with error message
-        return {
-            "error": str(e),
-            "description": f"Error analyzing frame: {str(e)}",
-            "ui_elements": [],
-            "actions": [],
-            "text_content": [],
-            "notes": f"Vision API call failed: {str(e)}",
-        }
+        return _analysis_error(e)
+
+
+async def analyze_frames_with_vision_api_async(
+    frames: List[FrameImage],
+    client: AsyncOpenAI,
+    prompt: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Analyze several frames with one vision API request.
+
+    The model is asked for one 'Image <n>:' section per frame. If its answer
+    cannot be split that way the frames are analyzed one request each.
+
+    Args:
+        frames: Frame images as numpy arrays or JPEG bytes
+        client: Async OpenAI-compatible client for the vision API
+        prompt: Prompt for vision API (defaults to DEFAULT_VISION_PROMPT)
+
+    Returns:
+        One analysis dictionary per frame, in input order
+    """
+    if len(frames) == 1:
+        return [await analyze_frame_with_vision_api_async(frames[0], client, prompt)]
+
+    try:
+        api_response = await client.chat.completions.create(
+            model=get_vision_model(),
+            messages=_build_multi_image_messages(frames, prompt),
+        )
+        description = api_response.choices[0].message.content or ""
+    except Exception as e:
+        return [_analysis_error(e)] * len(frames)
+
+    sections = _split_image_sections(description, len(frames))
+    if sections is None:
+        return list(await asyncio.gather(*(
+            analyze_frame_with_vision_api_async(frame, client, prompt) for frame in frames
+        )))
+    return [_analysis_from_description(section) for section in sections]
+
+
+_UI_KEYWORDS = (
+    "button",
+    "input",
+    "field",
+    "icon",
+    "link",
+    "menu",
+    "dropdown",
+    "filter",
+    "search",
+    "form",
+)
+_ACTION_KEYWORDS = (
+    "click",
+    "enter",
+    "type",
+    "select",
+    "navigate",
+    "filter",
+    "search",
+    "submit",
+    "open",
+    "close",
+)
+_ALL_KEYWORD_SET = frozenset(_UI_KEYWORDS + _ACTION_KEYWORDS)
+
+
+def _keyword_positions(words: List[str]) -> Dict[str, int]:
+    """Map each keyword present in `words` to its first index.
+
+    A single scan records first occurrences, so a description with many
+    keyword hits is not rescanned with words.index() once per keyword.
+    """
+    positions = {}
+    for idx, word in enumerate(words):
+        if word in _ALL_KEYWORD_SET and word not in positions:
+            positions[word] = idx
+            if len(positions) == len(_ALL_KEYWORD_SET):
+                break
+    return positions
+
+
+def _keyword_phrases(
+    words: List[str], positions: Dict[str, int], keywords, before: int, after: int
+) -> List[str]:
+    """Join the words around the first occurrence of each keyword present."""
+    phrases = []
+    for keyword in keywords:
+        idx = positions.get(keyword)
+        # Keywords that open the description have no phrase to extract
+        if idx is not None and idx > 0:
+            phrases.append(" ".join(words[max(0, idx - before) : idx + after]))
+    return phrases
+
+
+def _ui_element_phrases(words: List[str], positions: Dict[str, int]) -> List[str]:
+    """Phrases of two words before and one after each UI keyword."""
+    return _keyword_phrases(words, positions, _UI_KEYWORDS, before=2, after=2)
+
+
+def _action_phrases(words: List[str], positions: Dict[str, int]) -> List[str]:
+    """Phrases of one word before and two after each action keyword."""
+    return _keyword_phrases(words, positions, _ACTION_KEYWORDS, before=1, after=3)
+
+
+def extract_all(description: str) -> Dict[str, List[str]]:
+    """
+    Extract UI elements, actions and text content in one pass.
+
+    Equivalent to calling extract_ui_elements, extract_actions and
+    extract_text_content, but the description is lowercased, split and
+    searched for keywords only once.
+
+    Returns:
+        Dictionary with ui_elements, actions and text_content lists
+    """
+    words = description.lower().split()
+    positions = _keyword_positions(words)
+    return {
+        "ui_elements": _ui_element_phrases(words, positions),
+        "actions": _action_phrases(words, positions),
+        "text_content": extract_text_content(description),
+    }
 
 
 def extract_ui_elements(description: str) -> List[str]:
     """Extract UI elements mentioned in description."""
-    ui_keywords = [
-        "button",
-        "input",
-        "field",
-        "icon",
-        "link",
-        "menu",
-        "dropdown",
-        "filter",
-        "search",
-        "form",
-    ]
-    elements = []
+    if not description:
+        return []
     words = description.lower().split()
-    for keyword in ui_keywords:
-        if keyword in words:
-            # Try to extract the full phrase
-            idx = words.index(keyword)
-            if idx > 0:
-                phrase = " ".join(words[max(0, idx - 2) : idx + 2])
-                elements.append(phrase)
-    return elements
+    return _ui_element_phrases(words, _keyword_positions(words))
 
 
 def extract_actions(description: str) -> List[str]:
     """Extract actions mentioned in description."""
-    action_keywords = [
-        "click",
-        "enter",
-        "type",
-        "select",
-        "navigate",
-        "filter",
-        "search",
-        "submit",
-        "open",
-        "close",
-    ]
-    actions = []
+    if not description:
+        return []
     words = description.lower().split()
-    for keyword in action_keywords:
-        if keyword in words:
-            idx = words.index(keyword)
-            if idx > 0:
-                phrase = " ".join(words[max(0, idx - 1) : idx + 3])
-                actions.append(phrase)
-    return actions
+    return _action_phrases(words, _keyword_positions(words))
+
+
+# Quoted text, and capitalized phrases (likely UI labels)
+_QUOTED_RE = re.compile(r'"([^"]*)"')
+_CAPITALIZED_RE = re.compile(r"\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b")
 
 
 def extract_text_content(description: str) -> List[str]:
     """Extract text content mentioned in description."""
-    # Look for quoted text or capitalized phrases
-    import re
+    return _QUOTED_RE.findall(description) + _CAPITALIZED_RE.findall(description)
 
-    # Find quoted text
-    quoted = re.findall(r'"([^"]*)"', description)
-    # Find capitalized phrases (likely UI labels)
-    capitalized = re.findall(r"\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b", description)
-    return quoted + capitalized
+
+def _frame_image(frame_data: Dict[str, Any]) -> Optional[FrameImage]:
+    """Return the image of a frame dictionary.
+
+    Frames written to disk by the video analyzer (see its ``output_dir``)
+    carry a "frame_path"; their JPEG bytes are used as-is.
+    """
+    frame = frame_data.get("frame")
+    if frame is None and frame_data.get("frame_path"):
+        with open(frame_data["frame_path"], "rb") as f:
+            frame = f.read()
+    return frame
+
+
+def _with_analysis(frame_data: Dict[str, Any], analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """Attach an analysis result and its detections to a frame dictionary."""
+    return {
+        **frame_data,
+        "analysis": analysis,
+        "detected_actions": analysis.get("actions", []),
+        "ui_elements": analysis.get("ui_elements", []),
+        "text_content": analysis.get("text_content", []),
+    }
+
+
+# Suggested max_hash_distance for opting into near-duplicate reuse: frames
+# whose dHashes differ in at most this many bits are treated as the same
+# screen and share one vision API analysis. Off by default, since frames
+# that differ only in typed text or a field value can hash alike
+DHASH_MAX_DISTANCE = 5
+
+
+def _dhash(frame: FrameImage) -> int:
+    """Compute the 64-bit difference hash of a frame."""
+    if isinstance(frame, (bytes, bytearray, memoryview)):
+        # Decoding at 1/8 scale is plenty for a 9x8 hash
+        gray = cv2.imdecode(np.frombuffer(frame, np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    elif frame.ndim == 3:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    else:
+        gray = frame
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = np.packbits(small[:, 1:] > small[:, :-1])
+    return int.from_bytes(bits.tobytes(), "big")
+
+
+def _find_similar(cache: Dict[int, Any], frame_hash: int, max_distance: int) -> Any:
+    """Return the cached value for a hash within max_distance bits, if any."""
+    if frame_hash in cache:
+        return cache[frame_hash]
+    for cached_hash, value in cache.items():
+        if (frame_hash ^ cached_hash).bit_count() <= max_distance:
+            return value
+    return None
+
+
+# Bump when the request or its parsing changes so stale analyses are not reused
+_VISION_CACHE_VERSION = 1
+
+
+def _vision_cache_key(frame: FrameImage, prompt: Optional[str]) -> str:
+    """Hash a frame's content together with everything else sent with it."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps([
+        _VISION_CACHE_VERSION,
+        get_vision_model(),
+        prompt or DEFAULT_VISION_PROMPT,
+        DEFAULT_JPEG_QUALITY,
+        DEFAULT_MAX_IMAGE_DIM,
+    ]).encode("utf-8"))
+    if isinstance(frame, np.ndarray):
+        digest.update(f"{frame.shape}{frame.dtype.str}".encode("ascii"))
+        frame = np.ascontiguousarray(frame)
+    digest.update(frame)
+    return digest.hexdigest()
+
+
+def _open_vision_cache(cache_path: Optional[str]) -> ContextManager[Optional[shelve.Shelf]]:
+    """Open the on-disk vision cache; without one the context yields None."""
+    if cache_path:
+        try:
+            return shelve.open(cache_path)
+        except (OSError, *dbm.error):
+            pass
+    return nullcontext()
+
+
+def _cache_analysis(cache: Optional[shelve.Shelf], key: Optional[str], analysis: Dict[str, Any]) -> None:
+    """Store a successful analysis; failed calls are retried on the next run."""
+    if cache is None or key is None or "error" in analysis:
+        return
+    try:
+        cache[key] = analysis
+    except (OSError, ValueError, *dbm.error):
+        # A shelf closed before a late request finished raises ValueError
+        pass
+
+
+def _has_detections(analysis: Dict[str, Any]) -> bool:
+    """Check whether an analysis found anything that belongs on the timeline."""
+    return bool(
+        analysis.get("actions") or analysis.get("ui_elements") or analysis.get("text_content")
+    )
+
+
+def iter_analyzed_frames(
+    frames: Iterable[Dict[str, Any]],
+    prompt: Optional[str] = None,
+    max_hash_distance: Optional[int] = None,
+    skip_empty: bool = False,
+    cache_path: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Analyze frames one at a time, yielding each result as it completes.
+
+    Accepts any iterable (e.g. the iter_frames generator) so decoding and
+    analysis are pipelined without holding every frame in memory. With
+    `max_hash_distance` (e.g. DHASH_MAX_DISTANCE), a frame that looks like
+    one already analyzed reuses that analysis.
+
+    Args:
+        frames: Iterable of frame dictionaries with 'frame' key
+        prompt: Optional custom prompt
+        max_hash_distance: dHash distance for reusing an analysis (None, the
+            default, analyzes every frame)
+        skip_empty: Drop frames with no actions, UI elements or text
+        cache_path: Optional shelve file of analyses keyed by frame content
+
+    Yields:
+        Analyzed frames with detected actions
+    """
+    with _open_vision_cache(cache_path) as cache:
+
+        def analyze(frame: FrameImage) -> Dict[str, Any]:
+            key = _vision_cache_key(frame, prompt) if cache is not None else None
+            analysis = cache.get(key) if key is not None else None
+            if analysis is None:
+                analysis = analyze_frame_with_vision_api(frame, prompt)
+                _cache_analysis(cache, key, analysis)
+            return analysis
+
+        seen: Dict[int, Dict[str, Any]] = {}
+        for frame_data in frames:
+            frame = _frame_image(frame_data)
+            if frame is None:
+                analysis = {"error": "No frame data"}
+            elif max_hash_distance is None:
+                analysis = analyze(frame)
+            else:
+                frame_hash = _dhash(frame)
+                analysis = _find_similar(seen, frame_hash, max_hash_distance)
+                if analysis is None:
+                    analysis = seen[frame_hash] = analyze(frame)
+            if skip_empty and not _has_detections(analysis):
+                continue
+            yield _with_analysis(frame_data, analysis)
 
 
 def analyze_frames(
-    frames: List[Dict[str, Any]], prompt: Optional[str] = None
+    frames: Iterable[Dict[str, Any]],
+    prompt: Optional[str] = None,
+    concurrency: int = 16,
+    skip_empty: bool = False,
+    frames_per_request: int = 1,
+    cache_path: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
     """
     Analyze multiple frames and build action timeline.
 
+    Runs analyze_frames_async() to completion so vision API calls overlap.
+    When called from a thread that already runs an event loop (where
+    asyncio.run is not allowed) the frames are analyzed sequentially.
+
     Args:
-        frames: List of frame dictionaries with 'frame' key
+        frames: Iterable of frame dictionaries with 'frame' key
         prompt: Optional custom prompt
+        concurrency: Maximum number of concurrent vision API requests
+        skip_empty: Drop frames with no actions, UI elements or text, e.g.
+            when the result only feeds build_action_timeline()
+        frames_per_request: Maximum number of frames per vision API
+            request (the sequential fallback sends one frame per request)
+        cache_path: Optional shelve file of analyses keyed by frame
+            content, so frames analyzed by an earlier call or run are not
+            sent again
 
     Returns:
-        List of analyzed frames with detected actions
+        List of analyzed frames with detected actions, in input order
     """
-    analyzed_frames = []
-
-    for frame_data in frames:
-        frame = frame_data.get("frame")
-        if frame is not None:
-            analysis = analyze_frame_with_vision_api(frame, prompt)
-            analyzed_frames.append(
-                {
-                    **frame_data,
-                    "analysis": analysis,
-                    "detected_actions": analysis.get("actions", []),
-                    "ui_elements": analysis.get("ui_elements", []),
-                    "text_content": analysis.get("text_content", []),
-                }
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(
+            analyze_frames_async(
+                frames, prompt, concurrency, skip_empty, frames_per_request, cache_path
             )
+        )
+    return list(iter_analyzed_frames(frames, prompt, skip_empty=skip_empty, cache_path=cache_path))
+
+
+# Frames decoded ahead of the vision requests when streaming from a generator
+PREFETCH_FRAMES = 32
+
+_END = object()
+
+
+async def _aiter(items: Iterable[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+    """Iterate in-memory frames asynchronously."""
+    for item in items:
+        yield item
+
+
+async def _prefetched(frames: Iterable[Dict[str, Any]], maxsize: int) -> AsyncIterator[Dict[str, Any]]:
+    """Pull frames from an iterable in a worker thread, up to `maxsize` ahead.
+
+    A frame generator decodes video as it is iterated; doing that in a
+    thread lets the event loop keep the in-flight requests moving while
+    the next frames are being decoded.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize)
+    iterator = iter(frames)
+
+    async def produce() -> None:
+        try:
+            while True:
+                item = await asyncio.to_thread(next, iterator, _END)
+                await queue.put(item)
+                if item is _END:
+                    return
+        except Exception as e:
+            await queue.put(e)
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        producer.cancel()
+
+
+async def aiter_analyzed_frames(
+    frames: Iterable[Dict[str, Any]],
+    prompt: Optional[str] = None,
+    concurrency: int = 16,
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    max_hash_distance: Optional[int] = None,
+    skip_empty: bool = False,
+    frames_per_request: int = 1,
+    cache_path: Optional[str] = None,
+    client: Optional[AsyncOpenAI] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Analyze frames with up to `concurrency` vision API calls in flight.
+
+    Frames are pulled from the iterable only as slots free up, so a frame
+    generator is never fully materialized; it is read in a worker thread
+    at most PREFETCH_FRAMES ahead, so decoding overlaps the requests.
+    Results are yielded in input order. With `max_hash_distance` (e.g.
+    DHASH_MAX_DISTANCE), a frame that looks like one already analyzed (or
+    still in flight) shares that request instead of issuing a new one. With `frames_per_request` above 1, consecutive new
+    frames are sent together in multi-image requests (see
+    analyze_frames_with_vision_api_async). With `cache_path`, analyses are
+    also kept on disk keyed by frame content, and frames found there are
+    not sent at all.
+
+    Args:
+        frames: Iterable of frame dictionaries with 'frame' key
+        prompt: Optional custom prompt
+        concurrency: Maximum number of concurrent vision API requests
+        api_key: API key (defaults to GROQ_API_KEY env var)
+        base_url: Base URL (defaults to Groq API)
+        max_hash_distance: dHash distance for reusing an analysis (None, the
+            default, analyzes every frame)
+        skip_empty: Drop frames with no actions, UI elements or text
+        frames_per_request: Maximum number of frames per vision API request
+        cache_path: Optional shelve file of analyses keyed by frame content
+        client: Async OpenAI-compatible client to use instead of the one
+            shared on this event loop for api_key and base_url
+
+    Yields:
+        Analyzed frames with detected actions
+    """
+    if client is None:
+        client = _get_async_client(
+            api_key or os.getenv("GROQ_API_KEY"),
+            base_url or "https://api.groq.com/openai/v1",
+            get_async_http_client(),
+        )
+    with _open_vision_cache(cache_path) as cache:
+        seen: Dict[int, asyncio.Future] = {}
+        loop = asyncio.get_running_loop()
+        # Frames waiting to be sent together, with the futures of their analyses
+        group: List[Tuple[FrameImage, asyncio.Future]] = []
+
+        group_tasks = set()
+
+        async def analyze_group(members: List[Tuple[FrameImage, asyncio.Future]]) -> None:
+            try:
+                analyses = await analyze_frames_with_vision_api_async(
+                    [frame for frame, _ in members], client, prompt
+                )
+            except Exception as e:
+                analyses = [_analysis_error(e)] * len(members)
+            for (_, request), analysis in zip(members, analyses):
+                if not request.done():
+                    request.set_result(analysis)
+
+        def send_group() -> None:
+            if group:
+                task = asyncio.ensure_future(analyze_group(group[:]))
+                group_tasks.add(task)
+                task.add_done_callback(group_tasks.discard)
+                group.clear()
+
+        def analysis_request(frame: FrameImage) -> Tuple[asyncio.Future, Optional[str]]:
+            frame_hash = None
+            if max_hash_distance is not None:
+                frame_hash = _dhash(frame)
+                request = _find_similar(seen, frame_hash, max_hash_distance)
+                if request is not None:
+                    return request, None
+            cache_key = None
+            cached = None
+            if cache is not None:
+                cache_key = _vision_cache_key(frame, prompt)
+                cached = cache.get(cache_key)
+            if cached is not None:
+                request = loop.create_future()
+                request.set_result(cached)
+            elif frames_per_request > 1:
+                request = loop.create_future()
+                group.append((frame, request))
+                if len(group) >= frames_per_request:
+                    send_group()
+            else:
+                request = asyncio.ensure_future(
+                    analyze_frame_with_vision_api_async(frame, client, prompt)
+                )
+            if frame_hash is not None:
+                seen[frame_hash] = request
+            return request, cache_key if cached is None else None
+
+        async def analyze(
+            frame_data: Dict[str, Any], request: Optional[asyncio.Future], cache_key: Optional[str]
+        ) -> Optional[Dict[str, Any]]:
+            if request is not None:
+                analysis = await request
+                # Stored here rather than in a done callback, which could
+                # run only after the shelf is closed
+                _cache_analysis(cache, cache_key, analysis)
+            else:
+                analysis = {"error": "No frame data"}
+            if skip_empty and not _has_detections(analysis):
+                return None
+            return _with_analysis(frame_data, analysis)
+
+        # `concurrency` counts requests, so the window of frames is as many
+        # as that many requests carry
+        window = concurrency * max(frames_per_request, 1)
+        # Frames already in memory are iterated directly; anything else
+        # (e.g. an iter_frames generator) is decoded ahead in a thread
+        if isinstance(frames, (list, tuple)):
+            frame_source = _aiter(frames)
         else:
-            analyzed_frames.append(
-                {
-                    **frame_data,
-                    "analysis": {"error": "No frame data"},
-                    "detected_actions": [],
-                    "ui_elements": [],
-                    "text_content": [],
-                }
+            frame_source = _prefetched(frames, PREFETCH_FRAMES)
+
+        pending = deque()
+        try:
+            async for frame_data in frame_source:
+                frame = _frame_image(frame_data)
+                request, cache_key = analysis_request(frame) if frame is not None else (None, None)
+                pending.append((asyncio.ensure_future(analyze(frame_data, request, cache_key)), request))
+                if len(pending) >= window:
+                    task, request = pending.popleft()
+                    # The oldest frame may still wait in an unsent group
+                    if any(request is member for _, member in group):
+                        send_group()
+                    analyzed = await task
+                    if analyzed is not None:
+                        yield analyzed
+            send_group()
+            while pending:
+                task, _ = pending.popleft()
+                analyzed = await task
+                if analyzed is not None:
+                    yield analyzed
+        finally:
+            # A consumer that stops early leaves requests in flight; cancel
+            # them rather than letting them run on unobserved
+            for task, request in pending:
+                task.cancel()
+                if request is not None:
+                    request.cancel()
+            for task in group_tasks:
+                task.cancel()
+
+
+async def analyze_frames_async(
+    frames: Iterable[Dict[str, Any]],
+    prompt: Optional[str] = None,
+    concurrency: int = 16,
+    skip_empty: bool = False,
+    frames_per_request: int = 1,
+    cache_path: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Analyze multiple frames concurrently.
+
+    Args:
+        frames: Iterable of frame dictionaries with 'frame' key
+        prompt: Optional custom prompt
+        concurrency: Maximum number of concurrent vision API requests
+        skip_empty: Drop frames with no actions, UI elements or text
+        frames_per_request: Maximum number of frames per vision API request
+        cache_path: Optional shelve file of analyses keyed by frame content
+
+    Returns:
+        List of analyzed frames with detected actions, in input order
+    """
+    return [
+        analyzed
+        async for analyzed in aiter_analyzed_frames(
+            frames, prompt, concurrency, skip_empty=skip_empty,
+            frames_per_request=frames_per_request, cache_path=cache_path,
+        )
+    ]
+
+
+_BATCH_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+# How long analyze_frames_batch waits for a batch before giving up on it and
+# analyzing the frames interactively
+BATCH_TIMEOUT_SECONDS = 60 * 60
+
+
+def _batch_record_analysis(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn one line of a batch output or error file into an analysis."""
+    try:
+        body = record["response"]["body"]
+        description = body["choices"][0]["message"]["content"]
+        return _analysis_from_description(description)
+    except (KeyError, IndexError, TypeError) as e:
+        error = record.get("error")
+        if not error:
+            response = record.get("response") or {}
+            error = (response.get("body") or {}).get("error")
+        if isinstance(error, dict):
+            error = error.get("message") or error.get("code")
+        return _analysis_error(Exception(error or f"Malformed batch response: {e}"))
+
+
+def analyze_frames_batch(
+    frames: Iterable[Dict[str, Any]],
+    prompt: Optional[str] = None,
+    poll_interval: float = 30.0,
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    timeout: Optional[float] = BATCH_TIMEOUT_SECONDS,
+    client: Optional[OpenAI] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Analyze frames offline through the provider's Batch API.
+
+    All frame requests are uploaded as one JSONL file and the batch is
+    polled until it finishes, which is cheaper than interactive calls for
+    long videos but may take minutes to hours. Providers without a batch
+    endpoint, and batches still unfinished after `timeout` seconds (which
+    are cancelled), fall back to analyze_frames(). Requests the batch
+    reports in its error file get an error analysis.
+
+    Args:
+        frames: Iterable of frame dictionaries with 'frame' key
+        prompt: Optional custom prompt
+        poll_interval: Seconds between batch status checks
+        api_key: API key (defaults to GROQ_API_KEY env var)
+        base_url: Base URL (defaults to Groq API)
+        timeout: Seconds to wait for the batch (None waits until the
+            provider's completion window ends it)
+        client: OpenAI-compatible client to use instead of the shared one
+
+    Returns:
+        List of analyzed frames with detected actions, in input order
+    """
+    frames = list(frames)
+    if client is None:
+        client = _get_client(
+            api_key or os.getenv("GROQ_API_KEY"),
+            base_url or "https://api.groq.com/openai/v1",
+        )
+
+    lines = []
+    without_image = set()
+    for i, frame_data in enumerate(frames):
+        frame = _frame_image(frame_data)
+        if frame is None:
+            without_image.add(i)
+            continue
+        lines.append(json.dumps({
+            "custom_id": f"frame_{i}",
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": get_vision_model(),
+                "messages": _build_vision_messages(frame, prompt),
+            },
+        }))
+
+    analyses: Dict[str, Dict[str, Any]] = {}
+    if lines:
+        try:
+            input_file = client.files.create(
+                file=("frames.jsonl", "\n".join(lines).encode("utf-8")),
+                purpose="batch",
+            )
+            batch = client.batches.create(
+                input_file_id=input_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h",
             )
+        except NotFoundError:
+            return analyze_frames(frames, prompt)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while batch.status not in _BATCH_TERMINAL_STATUSES:
+            if deadline is not None and time.monotonic() >= deadline:
+                try:
+                    client.batches.cancel(batch.id)
+                except Exception:
+                    pass
+                return analyze_frames(frames, prompt)
+            time.sleep(poll_interval)
+            batch = client.batches.retrieve(batch.id)
+
+        # Successful requests land in the output file, failed ones in the
+        # error file
+        for file_id in (batch.output_file_id, getattr(batch, "error_file_id", None)):
+            if file_id:
+                for line in client.files.content(file_id).text.splitlines():
+                    if line.strip():
+                        record = json.loads(line)
+                        analyses[record["custom_id"]] = _batch_record_analysis(record)
+
+        batch_error = Exception(f"Batch {batch.id} {batch.status} without a result for this frame")
 
+    analyzed_frames = []
+    for i, frame_data in enumerate(frames):
+        if i in without_image:
+            analysis = {"error": "No frame data"}
+        else:
+            analysis = analyses.get(f"frame_{i}") or _analysis_error(batch_error)
+        analyzed_frames.append(_with_analysis(frame_data, analysis))
     return analyzed_frames
 
 
 def build_action_timeline(
-    analyzed_frames: List[Dict[str, Any]],
+    analyzed_frames: Iterable[Dict[str, Any]],
 ) -> List[Dict[str, Any]]:
     """
     Build timeline of observed actions from analyzed frames.
 
     Args:
-        analyzed_frames: List of analyzed frame dictionaries
+        analyzed_frames: Iterable of analyzed frame dictionaries
 
     Returns:
         Timeline of actions with timestamps
@@ -18,8 +18,8 @@ def parse_planning_log(log_path: str) -> Dict[str, Any]:
         - steps: List of step dictionaries with next_step, next_step_summary, etc.
         - assertions: List of assertion steps
     """
-    with open(log_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    # json.loads decodes the UTF-8 bytes itself, skipping the text layer
+    data = json.loads(Path(log_path).read_bytes())
 
     planner_agent = data.get("planner_agent", [])
     steps = []
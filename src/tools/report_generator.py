@@ -1,6 +1,11 @@
 """Generate deviation report."""
 
-from typing import List, Dict, Any, Optional
+import asyncio
+import html
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import List, Dict, Any, Iterator, Optional
 from pathlib import Path
 from datetime import datetime
 
@@ -27,99 +32,189 @@ def generate_deviation_report(
         return generate_markdown_report(match_results, test_output)
 
 
+def write_deviation_report(
+    match_results: List[Dict[str, Any]],
+    output_path: str,
+    test_output: Optional[Dict[str, Any]] = None,
+    output_format: str = "markdown"
+) -> None:
+    """
+    Generate the deviation report and stream it straight to a file.
+
+    Same content as generate_deviation_report() followed by save_report(),
+    but lines are written as they are produced instead of first being
+    joined into one string. The report goes to a temporary file next to
+    output_path that replaces it only once it is complete, so a failure
+    part-way never leaves a truncated report behind.
+
+    Args:
+        match_results: List of match result dictionaries
+        output_path: Path of the report file to write
+        test_output: Optional test output dictionary for cross-reference
+        output_format: Output format ("markdown" or "html")
+    """
+    if output_format == "html":
+        lines = _html_report_lines(match_results, test_output)
+    else:
+        lines = _markdown_report_lines(match_results, test_output)
+
+    output_file = Path(output_path)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+
+    # newline='' writes "\n" untranslated, like the bytes save_report writes
+    with tempfile.NamedTemporaryFile(
+        'w', encoding='utf-8', newline='', dir=output_file.parent,
+        prefix=f".{output_file.name}.", suffix=".tmp", delete=False
+    ) as f:
+        tmp_path = f.name
+        try:
+            f.write(next(lines, ""))
+            for line in lines:
+                f.write("\n")
+                f.write(line)
+        except BaseException:
+            f.close()
+            os.unlink(tmp_path)
+            raise
+    os.replace(tmp_path, output_file)
+
+
 def generate_markdown_report(
     match_results: List[Dict[str, Any]],
     test_output: Optional[Dict[str, Any]] = None
 ) -> str:
     """Generate markdown deviation report."""
-    report_lines = []
+    return "\n".join(_markdown_report_lines(match_results, test_output))
 
-    # Header
-    report_lines.append("# Deviation Report")
-    report_lines.append("")
-    report_lines.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    report_lines.append("")
 
-    # Summary
-    total_steps = len(match_results)
-    observed_count = sum(1 for r in match_results if r.get("result") == "observed")
-    deviation_count = total_steps - observed_count
+@dataclass(slots=True)
+class _ReportRow:
+    """One match result with everything the renderers display for it."""
 
-    report_lines.append("## Summary")
-    report_lines.append("")
-    report_lines.append(f"- **Total Steps:** {total_steps}")
-    report_lines.append(f"- **Observed:** {observed_count}")
-    report_lines.append(f"- **Deviations:** {deviation_count}")
-    report_lines.append("")
+    result: Dict[str, Any]
+    planned_action: str
+    is_deviation: bool
+    result_symbol: str
+    notes: str
+    deviation_type: str
 
-    # Test output cross-reference
-    if test_output:
-        report_lines.append("## Test Output Cross-Reference")
-        report_lines.append("")
-        report_lines.append(f"- **Test Outcome:** {test_output.get('test_outcome', 'unknown')}")
-        if test_output.get("failures"):
-            report_lines.append(f"- **Failures:** {len(test_output['failures'])}")
-            for failure in test_output["failures"]:
-                report_lines.append(f"  - {failure.get('message', '')[:100]}")
-        report_lines.append("")
 
-    # Detailed Results
-    report_lines.append("## Detailed Results")
-    report_lines.append("")
-    report_lines.append("| Step Description | Result | Notes |")
-    report_lines.append("|------------------|--------|-------|")
+@dataclass(slots=True)
+class _PreparedReport:
+    """Rows, summary counts and timestamp shared by both renderers."""
+
+    rows: List[_ReportRow]
+    total_steps: int
+    observed_count: int
+    deviation_count: int
+    generated_at: str
 
-    for i, result in enumerate(match_results, 1):
-        planned_action = result.get("planned_action", f"Step {i}")
-        match_status = result.get("result", "unknown")
 
-        # Format result symbol
-        if match_status == "observed":
-            result_symbol = "☑ Observed"
-        else:
-            result_symbol = "✗ Deviation"
+def _prepare_rows(match_results: List[Dict[str, Any]]) -> _PreparedReport:
+    """Derive every displayed field and the summary counts in one pass."""
+    rows = []
+    observed_count = 0
+
+    for i, result in enumerate(match_results, 1):
+        is_deviation = result.get("result", "unknown") != "observed"
+        if not is_deviation:
+            observed_count += 1
+        deviation_type = categorize_deviation_type(result)
 
         # Get notes
         notes = "-"
+        best_match = result.get("best_match")
         if not result.get("is_matched"):
-            best_match = result.get("best_match")
             if best_match:
                 notes = f"Partial match (score: {best_match['score']:.2f})"
             else:
-                deviation_type = categorize_deviation_type(result)
                 notes = f"Step {deviation_type} in video"
-        elif result.get("best_match"):
-            timestamp = result["best_match"].get("timestamp_formatted", "")
+        elif best_match:
+            timestamp = best_match.get("timestamp_formatted", "")
             if timestamp:
                 notes = f"Observed at {timestamp}"
 
+        rows.append(_ReportRow(
+            result=result,
+            planned_action=result.get("planned_action", f"Step {i}"),
+            is_deviation=is_deviation,
+            result_symbol="✗ Deviation" if is_deviation else "☑ Observed",
+            notes=notes,
+            deviation_type=deviation_type,
+        ))
+
+    return _PreparedReport(
+        rows=rows,
+        total_steps=len(rows),
+        observed_count=observed_count,
+        deviation_count=len(rows) - observed_count,
+        generated_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+    )
+
+
+def _markdown_report_lines(
+    match_results: List[Dict[str, Any]],
+    test_output: Optional[Dict[str, Any]] = None
+) -> Iterator[str]:
+    """Yield the lines of the markdown deviation report."""
+    report = _prepare_rows(match_results)
+
+    # Header
+    yield "# Deviation Report"
+    yield ""
+    yield f"Generated: {report.generated_at}"
+    yield ""
+
+    # Summary
+    yield "## Summary"
+    yield ""
+    yield f"- **Total Steps:** {report.total_steps}"
+    yield f"- **Observed:** {report.observed_count}"
+    yield f"- **Deviations:** {report.deviation_count}"
+    yield ""
+
+    # Test output cross-reference
+    if test_output:
+        yield "## Test Output Cross-Reference"
+        yield ""
+        yield f"- **Test Outcome:** {test_output.get('test_outcome', 'unknown')}"
+        if test_output.get("failures"):
+            yield f"- **Failures:** {len(test_output['failures'])}"
+            for failure in test_output["failures"]:
+                yield f"  - {failure.get('message', '')[:100]}"
+        yield ""
+
+    # Detailed Results
+    yield "## Detailed Results"
+    yield ""
+    yield "| Step Description | Result | Notes |"
+    yield "|------------------|--------|-------|"
+
+    for row in report.rows:
         # Truncate long descriptions
+        planned_action = row.planned_action
         if len(planned_action) > 60:
             planned_action = planned_action[:57] + "..."
 
-        report_lines.append(f"| {planned_action} | {result_symbol} | {notes} |")
+        yield f"| {planned_action} | {row.result_symbol} | {row.notes} |"
 
-    report_lines.append("")
+    yield ""
 
     # Deviations Detail
-    deviations = [r for r in match_results if r.get("result") != "observed"]
-    if deviations:
-        report_lines.append("## Deviations Detail")
-        report_lines.append("")
-        for i, deviation in enumerate(deviations, 1):
-            planned_action = deviation.get("planned_action", f"Step {i}")
-            deviation_type = categorize_deviation_type(deviation)
-            report_lines.append(f"### Deviation {i}: {deviation_type}")
-            report_lines.append("")
-            report_lines.append(f"**Planned Action:** {planned_action}")
-            report_lines.append("")
-            if deviation.get("best_match"):
-                best_match = deviation["best_match"]
-                report_lines.append(f"**Closest Match:** {best_match.get('observed_action', 'N/A')}")
-                report_lines.append(f"**Similarity Score:** {best_match.get('score', 0):.2f}")
-            report_lines.append("")
-
-    return "\n".join(report_lines)
+    if report.deviation_count:
+        yield "## Deviations Detail"
+        yield ""
+        deviations = (row for row in report.rows if row.is_deviation)
+        for i, row in enumerate(deviations, 1):
+            yield f"### Deviation {i}: {row.deviation_type}"
+            yield ""
+            yield f"**Planned Action:** {row.planned_action}"
+            yield ""
+            best_match = row.result.get("best_match")
+            if best_match:
+                yield f"**Closest Match:** {best_match.get('observed_action', 'N/A')}"
+                yield f"**Similarity Score:** {best_match.get('score', 0):.2f}"
+            yield ""
 
 
 def generate_html_report(
@@ -127,92 +222,112 @@ def generate_html_report(
     test_output: Optional[Dict[str, Any]] = None
 ) -> str:
     """Generate HTML deviation report."""
-    html_lines = []
-
-    html_lines.append("<!DOCTYPE html>")
-    html_lines.append("<html>")
-    html_lines.append("<head>")
-    html_lines.append('<meta charset="UTF-8">')
-    html_lines.append("<title>Deviation Report</title>")
-    html_lines.append("<style>")
-    html_lines.append("body { font-family: Arial, sans-serif; margin: 20px; }")
-    html_lines.append("table { border-collapse: collapse; width: 100%; margin: 20px 0; }")
-    html_lines.append("th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }")
-    html_lines.append("th { background-color: #f2f2f2; }")
-    html_lines.append(".observed { color: green; }")
-    html_lines.append(".deviation { color: red; }")
-    html_lines.append("</style>")
-    html_lines.append("</head>")
-    html_lines.append("<body>")
-
-    html_lines.append("<h1>Deviation Report</h1>")
-    html_lines.append(f"<p>Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>")
+    return "\n".join(_html_report_lines(match_results, test_output))
+
+
+# Static document start of the HTML report, up to the page heading
+_HTML_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="UTF-8">
+<title>Deviation Report</title>
+<style>
+body { font-family: Arial, sans-serif; margin: 20px; }
+table { border-collapse: collapse; width: 100%; margin: 20px 0; }
+th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }
+th { background-color: #f2f2f2; }
+.observed { color: green; }
+.deviation { color: red; }
+</style>
+</head>
+<body>
+<h1>Deviation Report</h1>"""
+
+
+def _html_report_lines(
+    match_results: List[Dict[str, Any]],
+    test_output: Optional[Dict[str, Any]] = None
+) -> Iterator[str]:
+    """Yield the lines of the HTML deviation report."""
+    report = _prepare_rows(match_results)
 
-    # Summary
-    total_steps = len(match_results)
-    observed_count = sum(1 for r in match_results if r.get("result") == "observed")
-    deviation_count = total_steps - observed_count
+    yield _HTML_HEAD
+    yield f"<p>Generated: {report.generated_at}</p>"
 
-    html_lines.append("<h2>Summary</h2>")
-    html_lines.append("<ul>")
-    html_lines.append(f"<li><strong>Total Steps:</strong> {total_steps}</li>")
-    html_lines.append(f"<li><strong>Observed:</strong> {observed_count}</li>")
-    html_lines.append(f"<li><strong>Deviations:</strong> {deviation_count}</li>")
-    html_lines.append("</ul>")
+    # Summary
+    yield "<h2>Summary</h2>"
+    yield "<ul>"
+    yield f"<li><strong>Total Steps:</strong> {report.total_steps}</li>"
+    yield f"<li><strong>Observed:</strong> {report.observed_count}</li>"
+    yield f"<li><strong>Deviations:</strong> {report.deviation_count}</li>"
+    yield "</ul>"
 
     # Table
-    html_lines.append("<h2>Detailed Results</h2>")
-    html_lines.append("<table>")
-    html_lines.append("<tr><th>Step Description</th><th>Result</th><th>Notes</th></tr>")
+    yield "<h2>Detailed Results</h2>"
+    yield "<table>"
+    yield "<tr><th>Step Description</th><th>Result</th><th>Notes</th></tr>"
 
-    for i, result in enumerate(match_results, 1):
-        planned_action = result.get("planned_action", f"Step {i}")
-        match_status = result.get("result", "unknown")
+    for row in report.rows:
+        result_class = "deviation" if row.is_deviation else "observed"
+        yield f"<tr class='{result_class}'>"
+        yield f"<td>{html.escape(row.planned_action)}</td>"
+        yield f"<td>{row.result_symbol}</td>"
+        yield f"<td>{html.escape(row.notes)}</td>"
+        yield "</tr>"
 
-        if match_status == "observed":
-            result_symbol = "☑ Observed"
-            result_class = "observed"
-        else:
-            result_symbol = "✗ Deviation"
-            result_class = "deviation"
+    yield "</table>"
+    yield "</body>"
+    yield "</html>"
 
-        notes = "-"
-        if not result.get("is_matched"):
-            best_match = result.get("best_match")
-            if best_match:
-                notes = f"Partial match (score: {best_match['score']:.2f})"
-            else:
-                deviation_type = categorize_deviation_type(result)
-                notes = f"Step {deviation_type} in video"
-        elif result.get("best_match"):
-            timestamp = result["best_match"].get("timestamp_formatted", "")
-            if timestamp:
-                notes = f"Observed at {timestamp}"
 
-        # Escape HTML
-        planned_action = planned_action.replace("<", "&lt;").replace(">", "&gt;")
-        notes = notes.replace("<", "&lt;").replace(">", "&gt;")
+def save_report(report_content: str, output_path: str) -> None:
+    """Save report to file."""
+    output_file = Path(output_path)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    # One write of the encoded report instead of a buffered text stream
+    output_file.write_bytes(report_content.encode('utf-8'))
 
-        html_lines.append(f"<tr class='{result_class}'>")
-        html_lines.append(f"<td>{planned_action}</td>")
-        html_lines.append(f"<td>{result_symbol}</td>")
-        html_lines.append(f"<td>{notes}</td>")
-        html_lines.append("</tr>")
 
-    html_lines.append("</table>")
-    html_lines.append("</body>")
-    html_lines.append("</html>")
+async def save_report_async(report_content: str, output_path: str) -> None:
+    """Save report to file in a worker thread so the event loop keeps running."""
+    await asyncio.to_thread(save_report, report_content, output_path)
 
-    return "\n".join(html_lines)
 
+class BatchReportSaver:
+    """
+    Buffer reports in memory and write them out in batches.
 
-def save_report(report_content: str, output_path: str) -> None:
-    """Save report to file."""
-    output_file = Path(output_path)
-    output_file.parent.mkdir(parents=True, exist_ok=True)
+    Useful when many test runs are processed back to back: writes are
+    deferred until `batch_size` reports are queued (or flush()/close() is
+    called), and repeated saves to the same path keep only the latest
+    content. Can be used as a context manager to flush on exit.
+    """
+
+    def __init__(self, batch_size: int = 10):
+        self.batch_size = batch_size
+        self._pending: Dict[str, str] = {}
+
+    def add(self, report_content: str, output_path: str) -> None:
+        """Queue a report, flushing once the batch is full."""
+        self._pending[output_path] = report_content
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write every queued report to disk."""
+        pending, self._pending = self._pending, {}
+        for output_path, report_content in pending.items():
+            save_report(report_content, output_path)
+
+    def close(self) -> None:
+        """Flush any remaining reports."""
+        self.flush()
+
+    def __enter__(self) -> "BatchReportSaver":
+        return self
 
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(report_content)
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
 
 
 def categorize_deviation_type(match_result: Dict[str, Any]) -> str:
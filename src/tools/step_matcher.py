@@ -1,7 +1,18 @@
 """Match planned steps with video evidence."""
 
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import List, Dict, Any, FrozenSet, Optional, Tuple
+import dbm
+import hashlib
+import json
 import re
+import shelve
+
+import numpy as np
+
+
+# Key action words compared between planned and observed actions
+_ACTION_WORDS = ("click", "enter", "type", "select", "navigate", "filter", "search", "submit", "open")
 
 
 def semantic_match(planned_action: str, observed_action: str) -> float:
@@ -15,21 +26,22 @@ def semantic_match(planned_action: str, observed_action: str) -> float:
     Returns:
         Similarity score between 0 and 1
     """
-    planned_lower = planned_action.lower()
-    observed_lower = observed_action.lower()
+    if not planned_action or not observed_action:
+        return 0.0
+    return _similarity(_features(planned_action), _features(observed_action))
+
+
+_Features = Tuple[FrozenSet[str], FrozenSet[str]]
 
-    # Extract key action words
-    action_words = ["click", "enter", "type", "select", "navigate", "filter", "search", "submit", "open"]
-    planned_actions = [word for word in action_words if word in planned_lower]
-    observed_actions = [word for word in action_words if word in observed_lower]
 
-    # Extract key objects (UI elements, text, etc.)
-    planned_objects = extract_objects(planned_action)
-    observed_objects = extract_objects(observed_action)
+def _similarity(planned: _Features, observed: _Features) -> float:
+    """Score two featurized actions (see semantic_match)."""
+    planned_actions, planned_objects = planned
+    observed_actions, observed_objects = observed
 
     # Calculate similarity
-    action_match = len(set(planned_actions) & set(observed_actions)) / max(len(set(planned_actions) | set(observed_actions)), 1)
-    object_match = len(set(planned_objects) & set(observed_objects)) / max(len(set(planned_objects) | set(observed_objects)), 1)
+    action_match = len(planned_actions & observed_actions) / max(len(planned_actions | observed_actions), 1)
+    object_match = len(planned_objects & observed_objects) / max(len(planned_objects | observed_objects), 1)
 
     # Weighted average
     similarity = (action_match * 0.6 + object_match * 0.4)
@@ -37,26 +49,231 @@ def semantic_match(planned_action: str, observed_action: str) -> float:
     return similarity
 
 
+@lru_cache(maxsize=4096)
+def _features(text: str) -> _Features:
+    """
+    Extract the action words and objects compared by semantic_match.
+
+    Cached because every observed timeline string is scored against every
+    planned step, so its features would otherwise be re-extracted per step.
+    """
+    text_lower = text.lower()
+    actions = frozenset(word for word in _ACTION_WORDS if word in text_lower)
+    return actions, frozenset(extract_objects(text))
+
+
+# Common UI elements
+_UI_ELEMENTS = ("search", "icon", "button", "input", "field", "filter", "menu", "link", "bar")
+# Quoted text (likely specific values)
+_QUOTED_RE = re.compile(r'"([^"]*)"')
+# Capitalized words (likely proper nouns or labels)
+_CAPITALIZED_RE = re.compile(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b')
+
+
 def extract_objects(text: str) -> List[str]:
     """Extract objects (UI elements, text content) from action description."""
-    objects = []
     text_lower = text.lower()
+    objects = [element for element in _UI_ELEMENTS if element in text_lower]
+    objects.extend(q.lower() for q in _QUOTED_RE.findall(text))
+    objects.extend(c.lower() for c in _CAPITALIZED_RE.findall(text))
+    return objects
 
-    # Common UI elements
-    ui_elements = ["search", "icon", "button", "input", "field", "filter", "menu", "link", "bar"]
-    for element in ui_elements:
-        if element in text_lower:
-            objects.append(element)
 
-    # Extract quoted text (likely specific values)
-    quoted = re.findall(r'"([^"]*)"', text)
-    objects.extend([q.lower() for q in quoted])
+# Observed strings of a timeline in matching order: (text, timeline item,
+# whether the text is an action rather than a UI element/text content)
+_ObservedEntry = Tuple[str, Dict[str, Any], bool]
 
-    # Extract capitalized words (likely proper nouns or labels)
-    capitalized = re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', text)
-    objects.extend([c.lower() for c in capitalized])
 
-    return objects
+def _flatten_timeline(timeline: List[Dict[str, Any]]) -> List[_ObservedEntry]:
+    """Flatten the timeline into the observed strings compared with each step."""
+    observed = []
+    for timeline_item in timeline:
+        for observed_action in timeline_item.get("actions", []):
+            observed.append((observed_action, timeline_item, True))
+        for element in timeline_item.get("ui_elements", []) + timeline_item.get("text_content", []):
+            observed.append((element, timeline_item, False))
+    return observed
+
+
+def _timeline_match(timeline_item: Dict[str, Any], observed_action: str, score: float) -> Dict[str, Any]:
+    """Build a match entry for an observed string of a timeline item."""
+    return {
+        "timeline_item": timeline_item,
+        "observed_action": observed_action,
+        "score": score,
+        "timestamp": timeline_item.get("timestamp", 0),
+        "timestamp_formatted": timeline_item.get("timestamp_formatted", "00:00"),
+    }
+
+
+def _planned_action(planned_step: Dict[str, Any]) -> str:
+    """Return the text of a planned step that is compared with the timeline."""
+    return planned_step.get("next_step_summary", "") or planned_step.get("next_step", "")
+
+
+# Outcome of matching one step, by position in the flattened timeline:
+# (best match position or None, best score, [(position, score) for all_matches])
+_StepScores = Tuple[Optional[int], float, List[Tuple[int, float]]]
+
+
+def _score_step(
+    planned_action: str,
+    observed: List[_ObservedEntry],
+    threshold: float
+) -> _StepScores:
+    """Score a planned step against a flattened timeline."""
+    best_position = None
+    best_score = 0.0
+    matches = []
+    planned_features = _features(planned_action)
+    # The same string often recurs across frames (e.g. a static screen)
+    scores: Dict[str, float] = {}
+
+    # Strings sharing no action word or object with the step score 0.0, so
+    # unless the threshold admits zero scores a featureless step matches nothing
+    if threshold > 0 and not any(planned_features):
+        observed = []
+
+    for position, (text, _, is_action) in enumerate(observed):
+        score = scores.get(text)
+        if score is None:
+            score = scores[text] = _similarity(planned_features, _features(text))
+        if score > best_score:
+            best_score = score
+            best_position = position
+
+        # Only actions are listed in all_matches
+        if is_action and score >= threshold:
+            matches.append((position, score))
+
+    return best_position, best_score, matches
+
+
+def _incidence(feature_sets: List[FrozenSet[str]], vocabulary: Dict[str, int]) -> np.ndarray:
+    """0/1 matrix with a row per feature set and a column per vocabulary entry.
+
+    Features outside the vocabulary are left out. float32 holds the 0/1
+    entries, and their products' integer sums, exactly.
+    """
+    rows, columns = [], []
+    for row, features in enumerate(feature_sets):
+        for feature in features:
+            column = vocabulary.get(feature)
+            if column is not None:
+                rows.append(row)
+                columns.append(column)
+    matrix = np.zeros((len(feature_sets), len(vocabulary)), dtype=np.float32)
+    matrix[rows, columns] = 1.0
+    return matrix
+
+
+def _jaccard_matrix(planned: List[FrozenSet[str]], observed: List[FrozenSet[str]]) -> np.ndarray:
+    """Jaccard index of every planned set with every observed set (0.0 when both are empty)."""
+    # Only features of some planned set can be shared, so the columns are
+    # the planned vocabulary; the rest of an observed set only adds to the
+    # union, which comes from the set sizes
+    vocabulary: Dict[str, int] = {}
+    for features in planned:
+        for feature in features:
+            vocabulary.setdefault(feature, len(vocabulary))
+    intersection = (
+        _incidence(planned, vocabulary) @ _incidence(observed, vocabulary).T
+    ).astype(np.float64)
+    planned_sizes = np.fromiter(map(len, planned), dtype=np.float64, count=len(planned))
+    observed_sizes = np.fromiter(map(len, observed), dtype=np.float64, count=len(observed))
+    union = planned_sizes[:, None] + observed_sizes[None, :] - intersection
+    return intersection / np.maximum(union, 1.0)
+
+
+def _score_steps(
+    planned_actions: List[str],
+    observed: List[_ObservedEntry],
+    threshold: float
+) -> List[_StepScores]:
+    """Score every planned step against a flattened timeline at once.
+
+    Same scores as _score_step, but the set intersections of all steps
+    with all distinct observed strings come from one matrix product.
+    """
+    texts = list(dict.fromkeys(text for text, _, _ in observed))
+    planned_features = [_features(action) for action in planned_actions]
+    observed_features = [_features(text) for text in texts]
+
+    action_match = _jaccard_matrix([f[0] for f in planned_features], [f[0] for f in observed_features])
+    object_match = _jaccard_matrix([f[1] for f in planned_features], [f[1] for f in observed_features])
+    # Weighted average, in the same operation order as _similarity
+    text_scores = action_match * 0.6 + object_match * 0.4
+
+    column = {text: i for i, text in enumerate(texts)}
+    columns = np.fromiter((column[text] for text, _, _ in observed), dtype=np.intp, count=len(observed))
+    is_action = np.fromiter((flag for _, _, flag in observed), dtype=bool, count=len(observed))
+
+    all_scores = []
+    for step_scores in text_scores:
+        scores = step_scores[columns]
+        best_position = int(scores.argmax()) if len(scores) else None
+        best_score = float(scores[best_position]) if best_position is not None else 0.0
+        # Like _score_step, the first highest positive score is the best match
+        if best_score <= 0.0:
+            best_position, best_score = None, 0.0
+        matches = [
+            (int(position), float(scores[position]))
+            for position in np.flatnonzero(is_action & (scores >= threshold))
+        ]
+        all_scores.append((best_position, best_score, matches))
+    return all_scores
+
+
+def _step_result(
+    planned_step: Dict[str, Any],
+    observed: List[_ObservedEntry],
+    threshold: float,
+    step_scores: _StepScores
+) -> Dict[str, Any]:
+    """Build the match result of a planned step from its scores."""
+    best_position, best_score, matches = step_scores
+    best_match = None
+    if best_position is not None:
+        text, timeline_item, _ = observed[best_position]
+        best_match = _timeline_match(timeline_item, text, best_score)
+
+    return {
+        "planned_step": planned_step,
+        "planned_action": _planned_action(planned_step),
+        "best_match": best_match,
+        "best_score": best_score,
+        "all_matches": [
+            _timeline_match(observed[position][1], observed[position][0], score)
+            for position, score in matches
+        ],
+        "is_matched": best_score >= threshold,
+        "result": "observed" if best_score >= threshold else "deviation",
+    }
+
+
+def _match_step(
+    planned_step: Dict[str, Any],
+    observed: List[_ObservedEntry],
+    threshold: float
+) -> Dict[str, Any]:
+    """Match a planned step against a flattened timeline."""
+    step_scores = _score_step(_planned_action(planned_step), observed, threshold)
+    return _step_result(planned_step, observed, threshold, step_scores)
+
+
+# Bump when scoring changes so stale cached scores are not reused
+_MATCH_CACHE_VERSION = 1
+
+
+def _match_cache_key(planned_actions: List[str], observed: List[_ObservedEntry], threshold: float) -> str:
+    """Hash everything that determines the scores of match_all_steps."""
+    signature = json.dumps([
+        _MATCH_CACHE_VERSION,
+        threshold,
+        planned_actions,
+        [(text, is_action) for text, _, is_action in observed],
+    ])
+    return hashlib.blake2b(signature.encode("utf-8"), digest_size=16).hexdigest()
 
 
 def match_step_with_timeline(
@@ -75,84 +292,64 @@ def match_step_with_timeline(
     Returns:
         Match result dictionary
     """
-    planned_action = planned_step.get("next_step_summary", "") or planned_step.get("next_step", "")
-    best_match = None
-    best_score = 0.0
-    matches = []
-
-    for timeline_item in timeline:
-        # Check actions
-        for observed_action in timeline_item.get("actions", []):
-            score = semantic_match(planned_action, observed_action)
-            if score > best_score:
-                best_score = score
-                best_match = {
-                    "timeline_item": timeline_item,
-                    "observed_action": observed_action,
-                    "score": score,
-                    "timestamp": timeline_item.get("timestamp", 0),
-                    "timestamp_formatted": timeline_item.get("timestamp_formatted", "00:00"),
-                }
-
-            if score >= threshold:
-                matches.append({
-                    "timeline_item": timeline_item,
-                    "observed_action": observed_action,
-                    "score": score,
-                    "timestamp": timeline_item.get("timestamp", 0),
-                    "timestamp_formatted": timeline_item.get("timestamp_formatted", "00:00"),
-                })
-
-        # Check UI elements and text content
-        ui_elements = timeline_item.get("ui_elements", [])
-        text_content = timeline_item.get("text_content", [])
-
-        for element in ui_elements + text_content:
-            score = semantic_match(planned_action, element)
-            if score > best_score:
-                best_score = score
-                best_match = {
-                    "timeline_item": timeline_item,
-                    "observed_action": element,
-                    "score": score,
-                    "timestamp": timeline_item.get("timestamp", 0),
-                    "timestamp_formatted": timeline_item.get("timestamp_formatted", "00:00"),
-                }
-
-    return {
-        "planned_step": planned_step,
-        "planned_action": planned_action,
-        "best_match": best_match,
-        "best_score": best_score,
-        "all_matches": matches,
-        "is_matched": best_score >= threshold,
-        "result": "observed" if best_score >= threshold else "deviation",
-    }
+    return _match_step(planned_step, _flatten_timeline(timeline), threshold)
 
 
 def match_all_steps(
     planned_steps: List[Dict[str, Any]],
     timeline: List[Dict[str, Any]],
-    threshold: float = 0.5
+    threshold: float = 0.5,
+    cache_path: Optional[str] = None
 ) -> List[Dict[str, Any]]:
     """
     Match all planned steps with video timeline.
 
+    The timeline is flattened once and all steps are scored against all
+    distinct observed strings together (see _score_steps).
+
+    With ``cache_path`` the scores are also kept in a shelve file keyed
+    by a hash of the planned actions and the observed strings, so a
+    repeated run over the same plan and timeline skips scoring entirely.
+
     Args:
         planned_steps: List of planned step dictionaries
         timeline: Timeline of observed actions
         threshold: Minimum similarity threshold
+        cache_path: Optional path of the on-disk score cache
 
     Returns:
         List of match results
     """
-    results = []
-
-    for step in planned_steps:
-        match_result = match_step_with_timeline(step, timeline, threshold)
-        results.append(match_result)
-
-    return results
+    observed = _flatten_timeline(timeline)
+    planned_actions = [_planned_action(step) for step in planned_steps]
+
+    cache_key = None
+    if cache_path:
+        cache_key = _match_cache_key(planned_actions, observed, threshold)
+        try:
+            with shelve.open(cache_path) as cache:
+                cached = cache.get(cache_key)
+        except (OSError, *dbm.error):
+            cached = None
+        if cached is not None:
+            return [
+                _step_result(step, observed, threshold, step_scores)
+                for step, step_scores in zip(planned_steps, cached)
+            ]
+
+    all_scores = _score_steps(planned_actions, observed, threshold)
+
+    if cache_key is not None:
+        try:
+            with shelve.open(cache_path) as cache:
+                cache[cache_key] = all_scores
+        except (OSError, *dbm.error):
+            pass
+
+    return [
+        _step_result(step, observed, threshold, step_scores)
+        for step, step_scores in zip(planned_steps, all_scores)
+    ]
 
 
 def categorize_deviation(match_result: Dict[str, Any]) -> str:
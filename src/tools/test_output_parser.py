@@ -1,8 +1,7 @@
 """Parse test results from test_result.html or test_result.xml."""
 
-import xml.etree.ElementTree as ET
-from bs4 import BeautifulSoup
-from typing import Dict, Any, List, Optional
+from lxml import etree, html as lxml_html
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 
 
@@ -10,15 +9,17 @@ def parse_test_output_xml(xml_path: str) -> Dict[str, Any]:
     """
     Parse test_result.xml to extract test outcomes.
 
+    The file is streamed with ``iterparse`` in a single pass; only the first
+    testsuite, its first testcase and that testcase's first failure and
+    properties block are read. Each element is removed once handled, and
+    parsing stops at the end of that testcase.
+
     Args:
         xml_path: Path to test_result.xml file
 
     Returns:
         Dictionary containing test results, plan, steps, and assertions
     """
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
-
     result = {
         "test_outcome": "unknown",
         "failures": [],
@@ -28,53 +29,90 @@ def parse_test_output_xml(xml_path: str) -> Dict[str, Any]:
         "properties": {},
     }
 
-    # Parse testsuite
-    testsuite = root.find("testsuite")
-    if testsuite is not None:
-        result["test_outcome"] = "failed" if int(testsuite.get("failures", 0)) > 0 else "passed"
-        result["total_tests"] = int(testsuite.get("tests", 0))
-        result["failures_count"] = int(testsuite.get("failures", 0))
-
-        # Parse testcase
-        testcase = testsuite.find("testcase")
-        if testcase is not None:
+    # huge_tree lifts libxml2's 10 MB text node limit (long failure output)
+    context = etree.iterparse(
+        xml_path, events=("start", "end"), huge_tree=True, collect_ids=False
+    )
+    _, root = next(context)
+    testsuite = testcase = failure = properties = None
+
+    for event, elem in context:
+        parent = elem.getparent()
+        if event == "start":
+            if elem.tag == "testsuite" and testsuite is None and parent is root:
+                # Parse testsuite
+                testsuite = elem
+                result["test_outcome"] = "failed" if int(elem.get("failures", 0)) > 0 else "passed"
+                result["total_tests"] = int(elem.get("tests", 0))
+                result["failures_count"] = int(elem.get("failures", 0))
+            elif elem.tag == "testcase" and testcase is None and testsuite is not None and parent is testsuite:
+                testcase = elem
+            elif elem.tag == "properties" and properties is None and testcase is not None and parent is testcase:
+                properties = elem
+            continue
+
+        if elem.tag == "failure" and failure is None and testcase is not None and parent is testcase:
             # Check for failure
-            failure = testcase.find("failure")
-            if failure is not None:
-                result["failures"].append({
-                    "message": failure.get("message", ""),
-                    "text": failure.text if failure.text else "",
+            failure = elem
+            result["failures"].append({
+                "message": elem.get("message", ""),
+                "text": elem.text if elem.text else "",
+            })
+        elif elem.tag == "property" and properties is not None and parent is properties:
+            name = elem.get("name", "")
+            value = elem.get("value", "")
+            result["properties"][name] = value
+
+            # Extract plan and steps from properties
+            if name == "plan":
+                result["plan"] = value
+                # Parse plan into steps
+                if value:
+                    result["steps"] = parse_plan_from_text(value)
+            elif name == "next_step":
+                result["steps"].append({
+                    "next_step": value,
+                    "summary": result["properties"].get("next_step_summary", ""),
                 })
-
-            # Parse properties
-            properties = testcase.find("properties")
-            if properties is not None:
-                for prop in properties.findall("property"):
-                    name = prop.get("name", "")
-                    value = prop.get("value", "")
-                    result["properties"][name] = value
-
-                    # Extract plan and steps from properties
-                    if name == "plan":
-                        result["plan"] = value
-                        # Parse plan into steps
-                        if value:
-                            result["steps"] = parse_plan_from_text(value)
-                    elif name == "next_step":
-                        result["steps"].append({
-                            "next_step": value,
-                            "summary": result["properties"].get("next_step_summary", ""),
-                        })
-                    elif name == "assert_summary" or "assert" in name.lower():
-                        result["assertions"].append({
-                            "assert_summary": value,
-                            "expected": extract_expected_from_assertion(value),
-                            "actual": extract_actual_from_assertion(value),
-                        })
+            elif name == "assert_summary" or "assert" in name.lower():
+                expected, actual = _split_assertion(value)
+                result["assertions"].append({
+                    "assert_summary": value,
+                    "expected": expected,
+                    "actual": actual,
+                })
+        if elem is testcase or elem is testsuite:
+            # Nothing after the first testcase (or a testsuite without
+            # one) can change the result, so the rest is not parsed
+            break
+        elem.clear()
+        # Drop finished siblings too, so memory stays flat however many
+        # elements come first
+        if parent is not None:
+            while elem.getprevious() is not None:
+                del parent[0]
 
     return result
 
 
+def _class_xpath(class_name: str) -> str:
+    """XPath predicate matching one token of an element's class attribute."""
+    return f'contains(concat(" ", normalize-space(@class), " "), " {class_name} ")'
+
+
+# Compiled once: lxml evaluates these in C instead of walking the tree in Python.
+_OUTCOME_XPATH = etree.XPath(
+    f'//*[{_class_xpath("outcome-failed")} or {_class_xpath("outcome-passed")}]'
+)
+_FAILED_HEADER_XPATH = etree.XPath('(//th[. = "Failed"])[1]/following-sibling::td[1]')
+_PROPLIST_XPATH = etree.XPath(f'//table[{_class_xpath("proplist")}]')
+
+
+def _stripped_text(element: Any) -> str:
+    """Concatenate an element's stripped text fragments, like BeautifulSoup's ``get_text(strip=True)``."""
+    return "".join(text.strip() for text in element.itertext())
+
+
 def parse_test_output_html(html_path: str) -> Dict[str, Any]:
     """
     Parse test_result.html to extract test outcomes.
@@ -85,8 +123,9 @@ def parse_test_output_html(html_path: str) -> Dict[str, Any]:
     Returns:
         Dictionary containing test results, plan, steps, and assertions
     """
-    with open(html_path, 'r', encoding='utf-8') as f:
-        soup = BeautifulSoup(f, 'html.parser')
+    # Without huge_tree, libxml2 silently drops text nodes over 10 MB
+    parser = lxml_html.HTMLParser(encoding="utf-8", huge_tree=True, collect_ids=False)
+    doc = lxml_html.parse(html_path, parser=parser)
 
     result = {
         "test_outcome": "unknown",
@@ -97,34 +136,32 @@ def parse_test_output_html(html_path: str) -> Dict[str, Any]:
         "properties": {},
     }
 
-    # Find test outcome
-    outcome_elem = soup.find(class_="outcome-failed")
-    if outcome_elem:
+    # Find test outcome; a failed marker anywhere wins over passed ones
+    outcome_classes = {
+        token
+        for elem in _OUTCOME_XPATH(doc)
+        for token in elem.get("class", "").split()
+    }
+    if "outcome-failed" in outcome_classes:
         result["test_outcome"] = "failed"
-    else:
-        outcome_elem = soup.find(class_="outcome-passed")
-        if outcome_elem:
-            result["test_outcome"] = "passed"
+    elif "outcome-passed" in outcome_classes:
+        result["test_outcome"] = "passed"
 
     # Find failure message
-    failure_elem = soup.find("th", string="Failed")
-    if failure_elem:
-        failure_td = failure_elem.find_next_sibling("td")
-        if failure_td:
-            result["failures"].append({
-                "message": failure_td.get_text(strip=True),
-            })
+    failure_tds = _FAILED_HEADER_XPATH(doc)
+    if failure_tds:
+        result["failures"].append({
+            "message": _stripped_text(failure_tds[0]),
+        })
 
     # Extract plan and steps from properties table
-    prop_tables = soup.find_all("table", class_="proplist")
-    for table in prop_tables:
-        rows = table.find_all("tr")
-        for row in rows:
-            th = row.find("th")
-            td = row.find("td")
-            if th and td:
-                name = th.get_text(strip=True)
-                value = td.get_text(strip=True)
+    for table in _PROPLIST_XPATH(doc):
+        for row in table.iter("tr"):
+            th = next(row.iter("th"), None)
+            td = next(row.iter("td"), None)
+            if th is not None and td is not None:
+                name = _stripped_text(th)
+                value = _stripped_text(td)
                 result["properties"][name] = value
 
                 if name == "plan":
@@ -136,10 +173,11 @@ def parse_test_output_html(html_path: str) -> Dict[str, Any]:
                         "summary": result["properties"].get("next_step_summary", ""),
                     })
                 elif "assert" in name.lower():
+                    expected, actual = _split_assertion(value)
                     result["assertions"].append({
                         "assert_summary": value,
-                        "expected": extract_expected_from_assertion(value),
-                        "actual": extract_actual_from_assertion(value),
+                        "expected": expected,
+                        "actual": actual,
                     })
 
     return result
@@ -162,24 +200,47 @@ def parse_plan_from_text(plan_text: str) -> List[Dict[str, str]]:
     return steps
 
 
+_EXPECTED_MARKER = "EXPECTED RESULT:"
+_ACTUAL_MARKER = "ACTUAL RESULT:"
+
+
+def _split_assertion(assertion_text: str) -> Tuple[Optional[str], Optional[str]]:
+    """Return ``(expected, actual)`` from assertion text; either is None when its marker is missing."""
+    expected = actual = None
+
+    actual_at = assertion_text.find(_ACTUAL_MARKER)
+    if actual_at >= 0:
+        start = actual_at + len(_ACTUAL_MARKER)
+        end = assertion_text.find(_ACTUAL_MARKER, start)
+        actual = assertion_text[start:end if end >= 0 else None].strip()
+
+    expected_at = assertion_text.find(_EXPECTED_MARKER)
+    if expected_at >= 0:
+        start = expected_at + len(_EXPECTED_MARKER)
+        end = assertion_text.find(_EXPECTED_MARKER, start)
+        if end < 0:
+            end = len(assertion_text)
+        # Expected text stops at the first ACTUAL marker after it; reuse the
+        # position found above when it already lies in range.
+        if start <= actual_at < end:
+            end = actual_at
+        else:
+            next_actual = assertion_text.find(_ACTUAL_MARKER, start, end)
+            if next_actual >= 0:
+                end = next_actual
+        expected = assertion_text[start:end].strip()
+
+    return expected, actual
+
+
 def extract_expected_from_assertion(assertion_text: str) -> Optional[str]:
     """Extract expected result from assertion text."""
-    if "EXPECTED RESULT:" in assertion_text:
-        parts = assertion_text.split("EXPECTED RESULT:")
-        if len(parts) > 1:
-            expected = parts[1].split("ACTUAL RESULT:")[0].strip()
-            return expected
-    return None
+    return _split_assertion(assertion_text)[0]
 
 
 def extract_actual_from_assertion(assertion_text: str) -> Optional[str]:
     """Extract actual result from assertion text."""
-    if "ACTUAL RESULT:" in assertion_text:
-        parts = assertion_text.split("ACTUAL RESULT:")
-        if len(parts) > 1:
-            actual = parts[1].strip()
-            return actual
-    return None
+    return _split_assertion(assertion_text)[1]
 
 
 def parse_test_output(file_path: str) -> Dict[str, Any]:
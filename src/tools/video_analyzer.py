@@ -1,59 +1,158 @@
 """Video processing and frame extraction."""
 
 import cv2
+import heapq
+import math
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import os
 
 
-def extract_frames(video_path: str, interval_seconds: float = 2.0) -> List[Dict[str, Any]]:
+# JPEG quality of frames written to an output_dir instead of kept in memory.
+# The action detector sends those files as they are, so this is also the
+# quality the vision model receives
+FRAME_JPEG_QUALITY = 70
+
+
+def downscale_frame(frame: np.ndarray, max_dim: Optional[int]) -> np.ndarray:
+    """Shrink a frame so its long edge is at most `max_dim` pixels (None keeps it)."""
+    height, width = frame.shape[:2]
+    if max_dim and max(height, width) > max_dim:
+        scale = max_dim / max(height, width)
+        frame = cv2.resize(
+            frame,
+            (max(1, round(width * scale)), max(1, round(height * scale))),
+            interpolation=cv2.INTER_AREA,
+        )
+    return frame
+
+
+def _frame_fields(frame: np.ndarray, frame_number: int, output_dir: Optional[str]) -> Dict[str, Any]:
+    """Keep a decoded frame in memory, or write it to output_dir and keep its path."""
+    if output_dir is None:
+        return {"frame": frame}
+    frame_path = os.path.join(output_dir, f"{frame_number:08d}.jpg")
+    cv2.imwrite(frame_path, frame, [cv2.IMWRITE_JPEG_QUALITY, FRAME_JPEG_QUALITY])
+    return {"frame_path": frame_path}
+
+
+def load_frame(frame_data: Dict[str, Any]) -> Optional[np.ndarray]:
+    """Return the BGR image of a frame dictionary, reading it from frame_path if needed."""
+    frame = frame_data.get("frame")
+    if frame is None and frame_data.get("frame_path"):
+        frame = cv2.imread(frame_data["frame_path"])
+    return frame
+
+
+def iter_frames(
+    video_path: str,
+    interval_seconds: float = 2.0,
+    include_frames: bool = True,
+    output_dir: Optional[str] = None,
+    max_dim: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
     """
-    Extract frames from video at regular intervals.
+    Yield frames from video at regular intervals as they are decoded.
+
+    Only the current frame is held in memory, so long videos can be
+    consumed without materializing every sampled frame first.
 
     Args:
         video_path: Path to video file
         interval_seconds: Interval between frames in seconds
-
-    Returns:
-        List of frame dictionaries with timestamp and frame data
+        include_frames: Whether to decode and keep the frame image data.
+            When False only frame metadata is yielded and no frame is
+            converted to a BGR image.
+        output_dir: Write frames there as JPEG files and yield their
+            "frame_path" instead of holding the "frame" array
+        max_dim: Downscale frames whose long edge exceeds this many pixels
+            as they are decoded (None keeps the full resolution)
+
+    Yields:
+        Frame dictionaries with timestamp and frame data
     """
     cap = cv2.VideoCapture(video_path)
     if not cap.isOpened():
         raise ValueError(f"Could not open video file: {video_path}")
 
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    frame_interval = int(fps * interval_seconds)
-    frames = []
-    frame_count = 0
+    if include_frames and output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_interval = int(fps * interval_seconds)
+        frame_count = 0
 
-        if frame_count % frame_interval == 0:
-            timestamp = frame_count / fps if fps > 0 else 0
-            frames.append({
-                "frame_number": frame_count,
-                "timestamp": timestamp,
-                "timestamp_formatted": format_timestamp(timestamp),
-                "frame": frame,
-            })
+        # grab() advances without converting to BGR; only sampled frames
+        # are retrieve()d as images
+        while cap.grab():
+            if frame_count % frame_interval == 0:
+                timestamp = frame_count / fps if fps > 0 else 0
+                entry = {
+                    "frame_number": frame_count,
+                    "timestamp": timestamp,
+                    "timestamp_formatted": format_timestamp(timestamp),
+                }
+                if include_frames:
+                    ret, frame = cap.retrieve()
+                    if not ret:
+                        break
+                    entry.update(_frame_fields(
+                        downscale_frame(frame, max_dim), frame_count, output_dir
+                    ))
+                yield entry
+
+            frame_count += 1
+    finally:
+        cap.release()
+
+
+def extract_frames(
+    video_path: str,
+    interval_seconds: float = 2.0,
+    include_frames: bool = True,
+    output_dir: Optional[str] = None,
+    max_dim: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Extract frames from video at regular intervals.
 
-        frame_count += 1
+    Args:
+        video_path: Path to video file
+        interval_seconds: Interval between frames in seconds
+        include_frames: Whether to decode and keep the frame image data
+        output_dir: Write frames there as JPEG files and keep their
+            "frame_path" instead of the "frame" array
+        max_dim: Downscale frames whose long edge exceeds this many pixels
+            as they are decoded (None keeps the full resolution)
 
-    cap.release()
-    return frames
+    Returns:
+        List of frame dictionaries with timestamp and frame data
+    """
+    return list(iter_frames(video_path, interval_seconds, include_frames, output_dir, max_dim))
 
 
-def extract_key_frames(video_path: str, threshold: float = 30.0) -> List[Dict[str, Any]]:
+# Thumbnail size used to compare consecutive frames in extract_key_frames
+_KEY_FRAME_DIFF_SIZE = (64, 64)
+
+
+def extract_key_frames(
+    video_path: str,
+    threshold: float = 30.0,
+    output_dir: Optional[str] = None,
+) -> List[Dict[str, Any]]:
     """
     Extract key frames at scene changes using frame difference.
 
     Args:
         video_path: Path to video file
         threshold: Threshold for detecting scene changes
+        output_dir: Write key frames there as JPEG files and keep their
+            "frame_path" instead of the "frame" array
 
     Returns:
         List of key frame dictionaries
@@ -62,9 +161,12 @@ def extract_key_frames(video_path: str, threshold: float = 30.0) -> List[Dict[st
     if not cap.isOpened():
         raise ValueError(f"Could not open video file: {video_path}")
 
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+
     fps = cap.get(cv2.CAP_PROP_FPS)
     frames = []
-    prev_frame = None
+    prev_small = None
     frame_count = 0
 
     while True:
@@ -72,12 +174,15 @@ def extract_key_frames(video_path: str, threshold: float = 30.0) -> List[Dict[st
         if not ret:
             break
 
-        if prev_frame is not None:
-            # Calculate frame difference
-            gray_prev = cv2.cvtColor(prev_frame, cv2.COLOR_BGR2GRAY)
-            gray_curr = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            diff = cv2.absdiff(gray_prev, gray_curr)
-            mean_diff = np.mean(diff)
+        # Scene changes show up just as well on a small grayscale thumbnail,
+        # and only the thumbnail has to be kept for the next comparison
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(gray, _KEY_FRAME_DIFF_SIZE, interpolation=cv2.INTER_AREA)
+
+        if prev_small is not None:
+            # Calculate frame difference (mean absolute difference, fused
+            # into one pass by the L1 norm)
+            mean_diff = cv2.norm(prev_small, small, cv2.NORM_L1) / small.size
 
             if mean_diff > threshold:
                 timestamp = frame_count / fps if fps > 0 else 0
@@ -85,7 +190,7 @@ def extract_key_frames(video_path: str, threshold: float = 30.0) -> List[Dict[st
                     "frame_number": frame_count,
                     "timestamp": timestamp,
                     "timestamp_formatted": format_timestamp(timestamp),
-                    "frame": frame,
+                    **_frame_fields(frame, frame_count, output_dir),
                     "diff_score": mean_diff,
                 })
         else:
@@ -95,11 +200,11 @@ def extract_key_frames(video_path: str, threshold: float = 30.0) -> List[Dict[st
                 "frame_number": frame_count,
                 "timestamp": timestamp,
                 "timestamp_formatted": format_timestamp(timestamp),
-                "frame": frame,
+                **_frame_fields(frame, frame_count, output_dir),
                 "diff_score": 0.0,
             })
 
-        prev_frame = frame.copy()
+        prev_small = small
         frame_count += 1
 
     cap.release()
@@ -108,8 +213,13 @@ def extract_key_frames(video_path: str, threshold: float = 30.0) -> List[Dict[st
 
 def format_timestamp(seconds: float) -> str:
     """Format timestamp as MM:SS."""
-    minutes = int(seconds // 60)
-    secs = int(seconds % 60)
+    return _format_whole_seconds(math.floor(seconds))
+
+
+@lru_cache(maxsize=8192)
+def _format_whole_seconds(whole_seconds: int) -> str:
+    """Format whole seconds as MM:SS; cached since sampled timestamps repeat."""
+    minutes, secs = divmod(whole_seconds, 60)
     return f"{minutes:02d}:{secs:02d}"
 
 
@@ -118,50 +228,80 @@ def save_frame(frame: np.ndarray, output_path: str) -> None:
     cv2.imwrite(output_path, frame)
 
 
-def process_multiple_videos(video_paths: List[str], interval_seconds: float = 2.0) -> Dict[str, List[Dict[str, Any]]]:
+def process_multiple_videos(
+    video_paths: List[str],
+    interval_seconds: float = 2.0,
+    max_workers: Optional[int] = None,
+    output_dir: Optional[str] = None,
+    max_dim: Optional[int] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
     """
     Process multiple videos and extract frames.
 
+    Videos are decoded concurrently; OpenCV releases the GIL while reading
+    frames, so a thread pool overlaps disk I/O and decode across videos.
+
     Args:
         video_paths: List of video file paths
         interval_seconds: Interval between frames in seconds
+        max_workers: Maximum number of videos decoded at once
+            (defaults to one per video, capped at the CPU count)
+        output_dir: Write frames as JPEG files into one subdirectory per
+            video there and keep their "frame_path" instead of the array
+        max_dim: Downscale frames whose long edge exceeds this many pixels
 
     Returns:
         Dictionary mapping video paths to their extracted frames
     """
-    all_frames = {}
-    for video_path in video_paths:
+    existing_paths = []
+    for video_path in dict.fromkeys(video_paths):
         if os.path.exists(video_path):
-            frames = extract_frames(video_path, interval_seconds)
-            all_frames[video_path] = frames
+            existing_paths.append(video_path)
         else:
             print(f"Warning: Video file not found: {video_path}")
-    return all_frames
+
+    if not existing_paths:
+        return {}
+
+    if max_workers is None:
+        max_workers = min(len(existing_paths), os.cpu_count() or 1)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(
+            lambda path, frames_dir: extract_frames(
+                path, interval_seconds, output_dir=frames_dir, max_dim=max_dim
+            ),
+            existing_paths,
+            [
+                os.path.join(output_dir, f"video_{i}") if output_dir is not None else None
+                for i in range(len(existing_paths))
+            ],
+        )
+        return dict(zip(existing_paths, results))
 
 
 def merge_video_timelines(video_frames: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
     """
     Merge frames from multiple videos into a unified timeline.
 
+    Each video's frames must already be in timestamp order, as extracted.
+    The per-video lists are then merged rather than re-sorted; frames with
+    equal timestamps keep the order of the videos.
+
     Args:
         video_frames: Dictionary mapping video paths to their frames
 
     Returns:
         Unified timeline of frames sorted by timestamp
     """
-    unified_timeline = []
-
-    for video_path, frames in video_frames.items():
+    def tagged(video_path: str, frames: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
         for frame in frames:
-            unified_timeline.append({
-                **frame,
-                "source_video": video_path,
-            })
-
-    # Sort by timestamp
-    unified_timeline.sort(key=lambda x: x["timestamp"])
+            yield {**frame, "source_video": video_path}
 
-    return unified_timeline
+    return list(heapq.merge(
+        *(tagged(video_path, frames) for video_path, frames in video_frames.items()),
+        key=itemgetter("timestamp"),
+    ))
 
 
 def get_video_info(video_path: str) -> Dict[str, Any]:
@@ -1,22 +1,201 @@
 """Comprehensive test script for Video Analysis Agent."""
 
+import os
 import sys
 import json
+import tempfile
+import asyncio
+import hashlib
+import inspect
 import logging
-from pathlib import Path
+import logging.handlers
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+from src.tools.log_parser import parse_planning_log, extract_action_descriptions
+from src.tools.test_output_parser import parse_test_output
+from src.tools.video_analyzer import (
+    extract_frames,
+    get_video_info,
+    process_multiple_videos,
+    merge_video_timelines
+)
+from src.tools.action_detector import (
+    DEFAULT_MAX_IMAGE_DIM,
+    DHASH_MAX_DISTANCE,
+    aiter_analyzed_frames,
+    analyze_frames,
+    analyze_frames_batch,
+    build_action_timeline
+)
+from src.tools.step_matcher import match_step_with_timeline, match_all_steps, semantic_match
+from src.tools.report_generator import generate_deviation_report, save_report
 
-# Setup logging
+# Setup logging; file writes are batched (errors flush right away)
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+log_file_handler = logging.FileHandler('test_output.log', delay=True)
+log_file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    format=LOG_FORMAT,
     handlers=[
-        logging.FileHandler('test_output.log'),
+        logging.handlers.MemoryHandler(1024, flushLevel=logging.ERROR, target=log_file_handler),
         logging.StreamHandler(sys.stdout)
     ]
 )
 logger = logging.getLogger(__name__)
 
+# Vision analyses kept across runs, so unchanged frames are not sent to
+# the API again (git-ignored)
+DEFAULT_VISION_CACHE_PATH = ".vision_cache"
+# Extracted frames kept across runs as JPEG files, so the unchanged video
+# is not decoded again (git-ignored)
+FRAME_CACHE_DIR = ".frame_cache"
+
+
+class _BufferedTestLogs(logging.Handler):
+    """Hold the log records of tests running in worker threads.
+
+    Records from a thread running a test are buffered and written once the
+    test has finished, so concurrent tests do not interleave in the log.
+    """
+
+    def __init__(self, handlers):
+        super().__init__()
+        self.handlers = handlers
+        self.buffers = {}
+
+    def emit(self, record):
+        buffer = self.buffers.get(record.thread)
+        if buffer is not None:
+            buffer.append(record)
+        else:
+            self.forward(record)
+
+    def forward(self, record):
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def run(self, test):
+        """Run a test, returning its result and buffered log records."""
+        ident = threading.get_ident()
+        records = self.buffers[ident] = []
+        try:
+            return test(), records
+        finally:
+            del self.buffers[ident]
+
+
+# One lock per cached call, so concurrent tests wait for a single load
+# instead of each missing the cache
+_load_locks = {}
+
+
+@lru_cache(maxsize=32)
+def _cached_load(load, path, mtime_ns, args):
+    return load(path, *args)
+
+
+def cached_load(load, path, *args):
+    """Load a data file once per modification time and arguments; later calls share the result."""
+    with _load_locks.setdefault((load, path, args), threading.Lock()):
+        return _cached_load(load, path, os.stat(path).st_mtime_ns, args)
+
+
+def load_frames(video_path, interval_seconds):
+    """Extract frames as JPEG files in FRAME_CACHE_DIR, reusing an earlier run's.
+
+    Cached frames are reused only while the video and the extractor's
+    source are unchanged; a missing or unreadable entry is extracted again.
+    """
+    stat = os.stat(video_path)
+    signature = json.dumps([
+        os.path.abspath(video_path),
+        stat.st_size,
+        stat.st_mtime_ns,
+        interval_seconds,
+        DEFAULT_MAX_IMAGE_DIM,
+        hashlib.blake2b(Path(inspect.getfile(extract_frames)).read_bytes()).hexdigest(),
+    ])
+    entry = Path(FRAME_CACHE_DIR) / hashlib.blake2b(signature.encode('utf-8'), digest_size=16).hexdigest()
+    manifest = entry / 'frames.json'
+    try:
+        frames = json.loads(manifest.read_bytes())
+        if all(os.path.isfile(frame['frame_path']) for frame in frames):
+            return frames
+    except Exception:
+        pass
+
+    # Written at the size sent to the vision model, as the CLI pipelines do
+    frames = extract_frames(
+        video_path, interval_seconds, output_dir=str(entry), max_dim=DEFAULT_MAX_IMAGE_DIM
+    )
+    # The manifest is written last, and atomically, so an interrupted run
+    # leaves no entry that looks complete
+    tmp_manifest = entry / f'frames.json.{os.getpid()}.tmp'
+    tmp_manifest.write_text(json.dumps(frames), encoding='utf-8')
+    os.replace(tmp_manifest, manifest)
+    return frames
+
+
+class StubVisionClient:
+    """Async OpenAI-compatible client answering vision requests offline.
+
+    `reply(n_images, n_request)` returns the message content of each
+    request; `requests` records how many images every request carried.
+    """
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, model, messages):
+        images = sum(1 for part in messages[0]["content"] if part["type"] == "image_url")
+        self.requests.append(images)
+        content = self.reply(images, len(self.requests))
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class StubBatchClient:
+    """OpenAI-compatible client whose Batch API finishes with canned result files."""
+
+    def __init__(self, output_lines, error_lines):
+        contents = {"output": output_lines, "errors": error_lines}
+        batch = SimpleNamespace(id="batch_1", status="completed", output_file_id="output", error_file_id="errors")
+        self.uploads = []
+        self.files = SimpleNamespace(
+            create=lambda file, purpose: self.uploads.append(file) or SimpleNamespace(id="input"),
+            content=lambda file_id: SimpleNamespace(text="\n".join(json.dumps(line) for line in contents[file_id])),
+        )
+        self.batches = SimpleNamespace(create=lambda **kwargs: batch, retrieve=lambda batch_id: batch)
+
+
+def analyze_offline(frames, client, **kwargs):
+    """Run aiter_analyzed_frames against a stub client and collect the results."""
+    async def collect():
+        return [analyzed async for analyzed in aiter_analyzed_frames(frames, client=client, **kwargs)]
+    return asyncio.run(collect())
+
+
+def search_screenshot(query):
+    """Draw a search form whose only difference between calls is the typed query."""
+    image = np.full((450, 800, 3), 255, np.uint8)
+    cv2.putText(image, "Search products", (50, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 1)
+    cv2.rectangle(image, (40, 40), (760, 100), (200, 200, 200), 2)
+    cv2.putText(image, query, (55, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
+    cv2.rectangle(image, (40, 150), (200, 200), (50, 120, 220), -1)
+    return image
+
+
 def test_log_parser():
     """Test log parser functionality."""
     logger.info("=" * 60)
@@ -24,25 +203,23 @@ def test_log_parser():
     logger.info("=" * 60)
 
     try:
-        from src.tools.log_parser import parse_planning_log, extract_action_descriptions
-
         log_path = "data/agent_inner_logs.json"
         logger.info(f"Parsing log file: {log_path}")
 
-        result = parse_planning_log(log_path)
+        result = cached_load(parse_planning_log, log_path)
 
-        logger.info(f"✓ Plan extracted: {len(result.get('plan', '').split('\\n'))} lines")
+        logger.info(f"✓ Plan extracted: {len(result.get('plan', '').split('\n'))} lines")
         logger.info(f"✓ Total steps: {result['total_steps']}")
         logger.info(f"✓ Total assertions: {result['total_assertions']}")
 
         # Log first few steps
-        logger.info("\\nFirst 3 steps:")
+        logger.info("\nFirst 3 steps:")
         for i, step in enumerate(result['steps'][:3], 1):
             logger.info(f"  Step {i}: {step.get('next_step_summary', 'N/A')}")
 
         # Extract actions
         actions = extract_action_descriptions(result['steps'])
-        logger.info(f"\\n✓ Extracted {len(actions)} action descriptions")
+        logger.info(f"\n✓ Extracted {len(actions)} action descriptions")
         logger.info(f"  Sample actions: {actions[:3]}")
 
         return True, result
@@ -53,18 +230,16 @@ def test_log_parser():
 
 def test_test_output_parser():
     """Test test output parser functionality."""
-    logger.info("\\n" + "=" * 60)
+    logger.info("\n" + "=" * 60)
     logger.info("TEST 2: Test Output Parser")
     logger.info("=" * 60)
 
     try:
-        from src.tools.test_output_parser import parse_test_output
-
         # Test XML parser
         xml_path = "data/test_result.xml"
         logger.info(f"Parsing XML file: {xml_path}")
 
-        xml_result = parse_test_output(xml_path)
+        xml_result = cached_load(parse_test_output, xml_path)
         logger.info(f"✓ Test outcome: {xml_result['test_outcome']}")
         logger.info(f"✓ Failures: {len(xml_result.get('failures', []))}")
         logger.info(f"✓ Plan extracted: {xml_result.get('plan') is not None}")
@@ -75,9 +250,9 @@ def test_test_output_parser():
 
         # Test HTML parser
         html_path = "data/test_result.html"
-        logger.info(f"\\nParsing HTML file: {html_path}")
+        logger.info(f"\nParsing HTML file: {html_path}")
 
-        html_result = parse_test_output(html_path)
+        html_result = cached_load(parse_test_output, html_path)
         logger.info(f"✓ Test outcome: {html_result['test_outcome']}")
         logger.info(f"✓ Failures: {len(html_result.get('failures', []))}")
         logger.info(f"✓ Plan extracted: {html_result.get('plan') is not None}")
@@ -90,40 +265,37 @@ def test_test_output_parser():
 
 def test_video_analyzer():
     """Test video analyzer functionality."""
-    logger.info("\\n" + "=" * 60)
+    logger.info("\n" + "=" * 60)
     logger.info("TEST 3: Video Analyzer")
     logger.info("=" * 60)
 
     try:
-        from src.tools.video_analyzer import (
-            extract_frames,
-            get_video_info,
-            process_multiple_videos,
-            merge_video_timelines
-        )
-
         video_path = "data/video.webm"
         logger.info(f"Analyzing video: {video_path}")
 
         # Get video info
         info = get_video_info(video_path)
-        logger.info(f"✓ Video info:")
-        logger.info(f"  Duration: {info['duration_formatted']}")
-        logger.info(f"  FPS: {info['fps']:.2f}")
-        logger.info(f"  Resolution: {info['width']}x{info['height']}")
-        logger.info(f"  Total frames: {info['frame_count']}")
+        logger.info("\n".join([
+            "✓ Video info:",
+            f"  Duration: {info['duration_formatted']}",
+            f"  FPS: {info['fps']:.2f}",
+            f"  Resolution: {info['width']}x{info['height']}",
+            f"  Total frames: {info['frame_count']}",
+        ]))
 
         # Extract frames
-        logger.info("\\nExtracting frames (interval: 2 seconds)...")
-        frames = extract_frames(video_path, interval_seconds=2.0)
+        logger.info("\nExtracting frames (interval: 2 seconds)...")
+        frames = cached_load(load_frames, video_path, 2.0)
         logger.info(f"✓ Extracted {len(frames)} frames")
 
         if frames:
-            logger.info(f"  First frame timestamp: {frames[0]['timestamp_formatted']}")
-            logger.info(f"  Last frame timestamp: {frames[-1]['timestamp_formatted']}")
+            logger.info(
+                f"  First frame timestamp: {frames[0]['timestamp_formatted']}\n"
+                f"  Last frame timestamp: {frames[-1]['timestamp_formatted']}"
+            )
 
         # Test multiple videos (same video for testing)
-        logger.info("\\nTesting multiple video processing...")
+        logger.info("\nTesting multiple video processing...")
         video_frames = process_multiple_videos([video_path], interval_seconds=2.0)
         logger.info(f"✓ Processed {len(video_frames)} video(s)")
 
@@ -139,25 +311,22 @@ def test_video_analyzer():
 
 def test_action_detector():
     """Test action detector functionality."""
-    logger.info("\\n" + "=" * 60)
+    logger.info("\n" + "=" * 60)
     logger.info("TEST 4: Action Detector")
     logger.info("=" * 60)
 
     try:
-        from src.tools.action_detector import analyze_frames, build_action_timeline
-        from src.tools.video_analyzer import extract_frames
-
         video_path = "data/video.webm"
         logger.info(f"Extracting frames for analysis: {video_path}")
 
         # Extract a few frames for testing
-        frames = extract_frames(video_path, interval_seconds=5.0)  # Larger interval for faster testing
+        frames = cached_load(load_frames, video_path, 5.0)  # Larger interval for faster testing
         logger.info(f"✓ Extracted {len(frames)} frames for analysis")
 
         if frames:
             # Analyze frames (this will use placeholder since vision API needs setup)
-            logger.info("\\nAnalyzing frames...")
-            analyzed = analyze_frames(frames[:3])  # Analyze first 3 frames only
+            logger.info("\nAnalyzing frames...")
+            analyzed = analyze_frames(frames[:3], cache_path=DEFAULT_VISION_CACHE_PATH)  # Analyze first 3 frames only
             logger.info(f"✓ Analyzed {len(analyzed)} frames")
 
             # Build timeline
@@ -178,19 +347,113 @@ def test_action_detector():
         return False, None
 
 
+def test_action_detector_offline():
+    """Test action detector request handling against a stubbed vision API."""
+    logger.info("\n" + "=" * 60)
+    logger.info("TEST 4b: Action Detector (stubbed vision API)")
+    logger.info("=" * 60)
+
+    try:
+        # Typing changes a few pixels of the search field only; both frames
+        # must still be analyzed on their own by default
+        frames = [
+            {"frame_number": 0, "timestamp": 0.0, "frame": search_screenshot("running shoes")},
+            {"frame_number": 50, "timestamp": 2.0, "frame": search_screenshot("running shoez")},
+        ]
+        client = StubVisionClient(lambda images, n: f'Request {n}: the search field shows "{n}"')
+        analyzed = analyze_offline(frames, client)
+        assert client.requests == [1, 1], client.requests
+        assert analyzed[0]["analysis"]["description"] != analyzed[1]["analysis"]["description"]
+        logger.info("✓ Frames differing only in typed text are analyzed separately")
+
+        # Opting into near-duplicate reuse shares one request between them
+        client = StubVisionClient(lambda images, n: f'Request {n}: the search field shows "{n}"')
+        analyzed = analyze_offline(frames, client, max_hash_distance=DHASH_MAX_DISTANCE)
+        assert client.requests == [1], client.requests
+        assert analyzed[0]["analysis"] is analyzed[1]["analysis"]
+        logger.info("✓ With max_hash_distance, a near-duplicate reuses the analysis")
+
+        # Vision cache: a second run over the same frames is answered from
+        # the cache without reaching the client
+        with tempfile.TemporaryDirectory(prefix="vision_cache_") as cache_dir:
+            cache_path = os.path.join(cache_dir, "vision")
+            first = analyze_offline(frames, StubVisionClient(lambda images, n: f"Request {n}: Click the Search button"),
+                                    cache_path=cache_path)
+            client = StubVisionClient(lambda images, n: "Request should not be sent")
+            cached = analyze_offline(frames, client, cache_path=cache_path)
+        assert client.requests == [], client.requests
+        assert [frame["analysis"] for frame in cached] == [frame["analysis"] for frame in first]
+        logger.info("✓ A vision cache hit skips the client")
+
+        # Multi-image requests: a reply with one section per image is split
+        # across its frames; one missing "Image 2:" falls back to a request
+        # per frame rather than shifting the sections onto the wrong frames
+        group = [
+            {"frame_number": 50 * i, "timestamp": 2.0 * i, "frame": search_screenshot(query)}
+            for i, query in enumerate(["shoes", "running shoes", "red running shoes"])
+        ]
+
+        def multi_reply(sections):
+            def reply(images, n):
+                if images == 1:
+                    return f"Request {n}: a single screenshot"
+                return "\n".join(f"Image {i}: screenshot {i} of the group" for i in sections)
+            return reply
+
+        client = StubVisionClient(multi_reply([1, 2, 3]))
+        analyzed = analyze_offline(group, client, frames_per_request=3)
+        assert client.requests == [3], client.requests
+        assert [frame["analysis"]["description"] for frame in analyzed] == [
+            f"screenshot {i} of the group" for i in (1, 2, 3)
+        ], analyzed
+        logger.info("✓ A multi-image reply is split into one analysis per frame")
+
+        client = StubVisionClient(multi_reply([1, 3]))
+        analyzed = analyze_offline(group, client, frames_per_request=3)
+        assert client.requests == [3, 1, 1, 1], client.requests
+        descriptions = [frame["analysis"]["description"] for frame in analyzed]
+        assert all(d.endswith("a single screenshot") for d in descriptions), descriptions
+        assert len(set(descriptions)) == 3, descriptions
+        logger.info("✓ A reply missing an image section falls back to one request per frame")
+
+        # Batch mode: frame 0 succeeds, frame 1 is reported in the error
+        # file, frame 2 is missing from both and frame 3 has no image
+        def batch_response(description):
+            return {"status_code": 200, "body": {"choices": [{"message": {"content": description}}]}}
+
+        client = StubBatchClient(
+            output_lines=[{"custom_id": "frame_0", "response": batch_response("Click the Search button")}],
+            error_lines=[{
+                "custom_id": "frame_1",
+                "response": {"status_code": 400, "body": {"error": {"message": "image too large"}}},
+                "error": None,
+            }],
+        )
+        batch_frames = frames + [{"frame_number": 100, "frame": search_screenshot("shoes")}, {"frame_number": 150}]
+        analyzed = analyze_frames_batch(batch_frames, client=client)
+        analyses = [frame["analysis"] for frame in analyzed]
+        assert "error" not in analyses[0] and analyses[0]["actions"], analyses[0]
+        assert analyses[1]["error"] == "image too large", analyses[1]
+        assert "without a result" in analyses[2]["error"], analyses[2]
+        assert analyses[3] == {"error": "No frame data"}, analyses[3]
+        logger.info("✓ Batch results, error file records and missing results map to their frames")
+
+        return True, None
+    except Exception as e:
+        logger.error(f"✗ Offline action detector test failed: {e}", exc_info=True)
+        return False, None
+
+
 def test_step_matcher():
     """Test step matcher functionality."""
-    logger.info("\\n" + "=" * 60)
+    logger.info("\n" + "=" * 60)
     logger.info("TEST 5: Step Matcher")
     logger.info("=" * 60)
 
     try:
-        from src.tools.step_matcher import match_step_with_timeline, match_all_steps, semantic_match
-        from src.tools.log_parser import parse_planning_log
-
         # Get planned steps
         log_path = "data/agent_inner_logs.json"
-        planning_data = parse_planning_log(log_path)
+        planning_data = cached_load(parse_planning_log, log_path)
         planned_steps = planning_data['steps']
 
         logger.info(f"✓ Loaded {len(planned_steps)} planned steps")
@@ -223,7 +486,7 @@ def test_step_matcher():
         logger.info(f"✓ Created mock timeline with {len(mock_timeline)} entries")
 
         # Test semantic matching
-        logger.info("\\nTesting semantic matching...")
+        logger.info("\nTesting semantic matching...")
         planned_action = planned_steps[0].get('next_step_summary', '') or planned_steps[0].get('next_step', '')
         observed_action = "navigate to wrangler.in"
         similarity = semantic_match(planned_action, observed_action)
@@ -232,14 +495,14 @@ def test_step_matcher():
         logger.info(f"  Observed: {observed_action}")
 
         # Test matching a step
-        logger.info("\\nTesting step matching...")
+        logger.info("\nTesting step matching...")
         match_result = match_step_with_timeline(planned_steps[0], mock_timeline, threshold=0.5)
         logger.info(f"✓ Match result: {match_result['result']}")
         logger.info(f"  Best score: {match_result['best_score']:.2f}")
         logger.info(f"  Is matched: {match_result['is_matched']}")
 
         # Test matching all steps
-        logger.info("\\nTesting matching all steps...")
+        logger.info("\nTesting matching all steps...")
         all_matches = match_all_steps(planned_steps[:3], mock_timeline, threshold=0.5)
         logger.info(f"✓ Matched {len(all_matches)} steps")
         observed_count = sum(1 for r in all_matches if r.get("result") == "observed")
@@ -253,22 +516,17 @@ def test_step_matcher():
 
 def test_report_generator():
     """Test report generator functionality."""
-    logger.info("\\n" + "=" * 60)
+    logger.info("\n" + "=" * 60)
     logger.info("TEST 6: Report Generator")
     logger.info("=" * 60)
 
     try:
-        from src.tools.report_generator import generate_deviation_report, save_report
-        from src.tools.step_matcher import match_all_steps
-        from src.tools.log_parser import parse_planning_log
-        from src.tools.test_output_parser import parse_test_output
-
         # Get data
         log_path = "data/agent_inner_logs.json"
         test_output_path = "data/test_result.xml"
 
-        planning_data = parse_planning_log(log_path)
-        test_output = parse_test_output(test_output_path)
+        planning_data = cached_load(parse_planning_log, log_path)
+        test_output = cached_load(parse_test_output, test_output_path)
 
         # Create mock timeline
         mock_timeline = [
@@ -294,19 +552,18 @@ def test_report_generator():
         logger.info(f"✓ Generated {len(match_results)} match results")
 
         # Generate markdown report
-        logger.info("\\nGenerating markdown report...")
+        logger.info("\nGenerating markdown report...")
         md_report = generate_deviation_report(match_results, test_output, output_format="markdown")
         logger.info(f"✓ Markdown report generated ({len(md_report)} characters)")
         logger.info(f"  Preview: {md_report[:200]}...")
 
         # Save report
         output_path = "test_output/test_report.md"
-        Path("test_output").mkdir(exist_ok=True)
         save_report(md_report, output_path)
         logger.info(f"✓ Report saved to: {output_path}")
 
         # Generate HTML report
-        logger.info("\\nGenerating HTML report...")
+        logger.info("\nGenerating HTML report...")
         html_report = generate_deviation_report(match_results, test_output, output_format="html")
         logger.info(f"✓ HTML report generated ({len(html_report)} characters)")
 
@@ -322,35 +579,28 @@ def test_report_generator():
 
 def test_full_workflow():
     """Test the full workflow end-to-end."""
-    logger.info("\\n" + "=" * 60)
+    logger.info("\n" + "=" * 60)
     logger.info("TEST 7: Full Workflow")
     logger.info("=" * 60)
 
     try:
-        from src.tools.log_parser import parse_planning_log
-        from src.tools.test_output_parser import parse_test_output
-        from src.tools.video_analyzer import extract_frames
-        from src.tools.action_detector import analyze_frames, build_action_timeline
-        from src.tools.step_matcher import match_all_steps
-        from src.tools.report_generator import generate_deviation_report, save_report
-
         # Step 1: Parse planning log
         logger.info("Step 1: Parsing planning log...")
-        planning_data = parse_planning_log("data/agent_inner_logs.json")
+        planning_data = cached_load(parse_planning_log, "data/agent_inner_logs.json")
         logger.info(f"  ✓ Extracted {planning_data['total_steps']} steps")
 
         # Step 2: Parse test output
         logger.info("Step 2: Parsing test output...")
-        test_output = parse_test_output("data/test_result.xml")
+        test_output = cached_load(parse_test_output, "data/test_result.xml")
         logger.info(f"  ✓ Test outcome: {test_output['test_outcome']}")
 
         # Step 3: Analyze video (limited frames for testing)
         logger.info("Step 3: Analyzing video...")
-        frames = extract_frames("data/video.webm", interval_seconds=5.0)
+        frames = cached_load(load_frames, "data/video.webm", 5.0)
         logger.info(f"  ✓ Extracted {len(frames)} frames")
 
         # Analyze frames
-        analyzed = analyze_frames(frames[:5])  # Analyze first 5 frames
+        analyzed = analyze_frames(frames[:5], cache_path=DEFAULT_VISION_CACHE_PATH)  # Analyze first 5 frames
         timeline = build_action_timeline(analyzed)
         logger.info(f"  ✓ Built timeline with {len(timeline)} action points")
 
@@ -365,12 +615,11 @@ def test_full_workflow():
         logger.info("Step 5: Generating report...")
         report = generate_deviation_report(match_results, test_output, output_format="markdown")
         output_path = "test_output/full_workflow_report.md"
-        Path("test_output").mkdir(exist_ok=True)
         save_report(report, output_path)
         logger.info(f"  ✓ Report saved to: {output_path}")
 
         # Summary
-        logger.info("\\n" + "=" * 60)
+        logger.info("\n" + "=" * 60)
         logger.info("WORKFLOW SUMMARY")
         logger.info("=" * 60)
         logger.info(f"Total Steps: {len(match_results)}")
@@ -386,48 +635,77 @@ def test_full_workflow():
 
 def main():
     """Run all tests."""
-    logger.info("\\n" + "=" * 60)
+    logger.info("\n" + "=" * 60)
     logger.info("VIDEO ANALYSIS AGENT - COMPREHENSIVE TEST SUITE")
     logger.info("=" * 60)
     logger.info(f"Test started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    logger.info("\\n")
+    logger.info("\n")
 
     results = {}
 
-    # Run all tests
-    results['log_parser'] = test_log_parser()
-    results['test_output_parser'] = test_test_output_parser()
-    results['video_analyzer'] = test_video_analyzer()
-    results['action_detector'] = test_action_detector()
-    results['step_matcher'] = test_step_matcher()
-    results['report_generator'] = test_report_generator()
+    # The component tests share no state, so they run concurrently (video decoding
+    # and the vision requests release the GIL); their logs are written in
+    # test order as each one finishes
+    independent_tests = {
+        'log_parser': test_log_parser,
+        'test_output_parser': test_test_output_parser,
+        'video_analyzer': test_video_analyzer,
+        'action_detector': test_action_detector,
+        'action_detector_offline': test_action_detector_offline,
+        'step_matcher': test_step_matcher,
+        'report_generator': test_report_generator,
+    }
+    root_logger = logging.getLogger()
+    test_logs = _BufferedTestLogs(root_logger.handlers[:])
+    root_logger.handlers[:] = [test_logs]
+    try:
+        with ThreadPoolExecutor(max_workers=len(independent_tests)) as executor:
+            futures = {
+                name: executor.submit(test_logs.run, test)
+                for name, test in independent_tests.items()
+            }
+            for name, future in futures.items():
+                results[name], records = future.result()
+                for record in records:
+                    test_logs.forward(record)
+    finally:
+        root_logger.handlers[:] = test_logs.handlers
+
+    # The full workflow runs alone, after the component tests
     results['full_workflow'] = test_full_workflow()
 
     # Summary
-    logger.info("\\n" + "=" * 60)
+    logger.info("\n" + "=" * 60)
     logger.info("TEST SUMMARY")
     logger.info("=" * 60)
 
     passed = sum(1 for success, _ in results.values() if success)
     total = len(results)
 
-    for test_name, (success, _) in results.items():
-        status = "✓ PASSED" if success else "✗ FAILED"
-        logger.info(f"{test_name:30s} {status}")
+    summary = [
+        f"{test_name:30s} {'✓ PASSED' if success else '✗ FAILED'}"
+        for test_name, (success, _) in results.items()
+    ]
+    logger.info("\n".join(summary))
 
-    logger.info("\\n" + "-" * 60)
-    logger.info(f"Total: {passed}/{total} tests passed")
-    logger.info(f"Test completed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    logger.info("\\nLog file saved to: test_output.log")
+    logger.info("\n".join([
+        "\n" + "-" * 60,
+        f"Total: {passed}/{total} tests passed",
+        f"Test completed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        "\nLog file saved to: test_output.log",
+    ]))
 
     if passed == total:
-        logger.info("\\n🎉 All tests passed!")
+        logger.info("\n🎉 All tests passed!")
         return 0
     else:
-        logger.error(f"\\n⚠️  {total - passed} test(s) failed")
+        logger.error(f"\n⚠️  {total - passed} test(s) failed")
         return 1
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    exit_code = main()
+    # Flush the buffered log file
+    logging.shutdown()
+    sys.exit(exit_code)
 